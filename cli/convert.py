@@ -0,0 +1,131 @@
+import concurrent.futures
+import itertools
+import logging
+import os
+import pathlib
+import time
+import xml.etree.ElementTree as ET
+
+from common.errors import ZHSerError
+from model.formats import SUFFIXES, EXTENSIONS, FORMATS, XML, detect_format, read_records, write_records
+
+logger = logging.getLogger(__name__)
+
+CHUNK_RECORDS = 100000
+MAX_ERRORS = 20
+
+
+def find_inputs(paths, fmt: str = None):
+    inputs = []
+    for path in paths:
+        path = pathlib.Path(path)
+        if path.is_dir():
+            for filename in sorted(path.rglob('*')):
+                if filename.is_file() and (fmt is not None or filename.suffix.lower() in SUFFIXES):
+                    inputs.append((filename, filename.relative_to(path)))
+        else:
+            inputs.append((path, pathlib.Path(path.name)))
+    return inputs
+
+
+def _open_output(filename, fmt):
+    if fmt == XML:
+        return open(filename, 'w', encoding='utf-8')
+    return open(filename, 'wb')
+
+
+def _summary(source):
+    return dict(file=str(source), records=0, skipped=0, failed=False, errors=[], outputs=[], bytes=0, seconds=0.0)
+
+
+def _failed(source, error):
+    summary = _summary(source)
+    summary['errors'].append('{}: {}'.format(type(error).__name__, error))
+    summary['failed'] = True
+    return summary
+
+
+def convert_file(source, relative, outdir, fmt_in: str, fmt_out: str, chunk_records: int = CHUNK_RECORDS):
+    started = time.perf_counter()
+    summary = _summary(source)
+
+    def on_error(lineno, line, error):
+        if len(summary['errors']) < MAX_ERRORS:
+            summary['errors'].append('line {}: {}'.format(lineno, error))
+        summary['skipped'] += 1
+
+    try:
+        summary['bytes'] = os.path.getsize(source)
+        fmt_in = fmt_in if fmt_in is not None else detect_format(source)
+        target = pathlib.Path(outdir) / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        records = iter(read_records(source, fmt_in, on_error=on_error))
+        for part in itertools.count():
+            first = next(records, None)
+            if first is None:
+                break
+            chunk = itertools.chain((first,), itertools.islice(records, chunk_records - 1)) if chunk_records \
+                else itertools.chain((first,), records)
+            # keep the input suffix, a.xml and a.ndjson next to each other must not write the same parts
+            filename = target.with_name('{}-{:05d}{}'.format(target.name, part, EXTENSIONS[fmt_out]))
+            with _open_output(filename, fmt_out) as fileobj:
+                summary['records'] += write_records(chunk, fileobj, fmt_out)
+            summary['outputs'].append(str(filename))
+    except (ZHSerError, ET.ParseError, ValueError, OSError) as error:
+        summary['errors'].append('{}: {}'.format(type(error).__name__, error))
+        summary['failed'] = True
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def convert(paths, outdir, fmt_out: str, fmt_in: str = None, workers: int = None,
+            chunk_records: int = CHUNK_RECORDS, progress=None):
+    if fmt_out not in FORMATS:
+        raise ValueError('Unknown LibRML format "{}".'.format(fmt_out))
+    inputs = find_inputs(paths, fmt_in)
+    seen = {}
+    for source, relative in inputs:
+        if relative in seen:
+            raise ValueError('"{}" and "{}" would both be written to "{}".'.format(
+                seen[relative], source, pathlib.Path(outdir) / relative))
+        seen[relative] = source
+    workers = workers if workers else os.cpu_count() or 1
+    started = time.perf_counter()
+    summaries = {}
+    if workers == 1 or len(inputs) <= 1:
+        for source, relative in inputs:
+            try:
+                summaries[source] = convert_file(source, relative, outdir, fmt_in, fmt_out, chunk_records)
+            except Exception as error:
+                logger.exception('Can not convert "{}".'.format(source))
+                summaries[source] = _failed(source, error)
+            if progress is not None:
+                progress(summaries[source])
+    else:
+        # one input file per task, each worker streams its file record by record
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(inputs))) as executor:
+            futures = {executor.submit(convert_file, source, relative, outdir, fmt_in, fmt_out, chunk_records): source
+                       for source, relative in inputs}
+            for future in concurrent.futures.as_completed(futures):
+                source = futures[future]
+                # a file that crashed its worker fails on its own, the other files still get converted
+                try:
+                    summaries[source] = future.result()
+                except Exception as error:
+                    logger.error('Can not convert "{}": {}'.format(source, error))
+                    summaries[source] = _failed(source, error)
+                if progress is not None:
+                    progress(summaries[source])
+    seconds = time.perf_counter() - started
+    files = [summaries[source] for source, relative in inputs]
+    records = sum(summary['records'] for summary in files)
+    size = sum(summary['bytes'] for summary in files)
+    return dict(files=files,
+                records=records,
+                failed=sum(1 for summary in files if summary['failed']),
+                skipped=sum(summary['skipped'] for summary in files),
+                bytes=size,
+                seconds=seconds,
+                workers=workers,
+                records_per_second=records / seconds if seconds else 0.0,
+                megabytes_per_second=size / seconds / (1 << 20) if seconds else 0.0)
@@ -0,0 +1,63 @@
+import argparse
+import json
+import logging
+import sys
+
+from cli.convert import CHUNK_RECORDS, convert
+from model.formats import FORMATS
+
+logger = logging.getLogger(__name__)
+
+
+def _print_file(summary):
+    status = 'FAILED' if summary['failed'] else 'ok'
+    print('{}: {} records, {} outputs, {:.2f}s, {} ({} errors)'.format(
+        summary['file'], summary['records'], len(summary['outputs']), summary['seconds'], status,
+        len(summary['errors'])), file=sys.stderr)
+    for error in summary['errors']:
+        print('    {}'.format(error), file=sys.stderr)
+
+
+def cmd_convert(args):
+    try:
+        report = convert(args.inputs, args.output, args.to, fmt_in=args.source_format, workers=args.workers,
+                         chunk_records=args.chunk_records, progress=None if args.quiet else _print_file)
+    except ValueError as error:
+        print('pylibrml convert: {}'.format(error), file=sys.stderr)
+        return 2
+    print('{} files ({} failed), {} records, {} skipped lines in {:.2f}s with {} workers: '
+          '{:.0f} records/s, {:.1f} MB/s'.format(len(report['files']), report['failed'], report['records'],
+                                                 report['skipped'], report['seconds'], report['workers'],
+                                                 report['records_per_second'], report['megabytes_per_second']),
+          file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as fileobj:
+            json.dump(report, fileobj, indent=2)
+    return 1 if report['failed'] or report['skipped'] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pylibrml', description='Tools for LibRML records.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    convert_parser = commands.add_parser('convert', help='convert LibRML files between xml, ndjson and binary')
+    convert_parser.add_argument('inputs', nargs='+', help='input files or directories')
+    convert_parser.add_argument('-o', '--output', required=True, help='output directory')
+    convert_parser.add_argument('-t', '--to', required=True, choices=FORMATS, help='output format')
+    convert_parser.add_argument('-f', '--from', dest='source_format', choices=FORMATS,
+                                help='input format, by default taken from the file suffix')
+    convert_parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: all cores)')
+    convert_parser.add_argument('--chunk-records', type=int, default=CHUNK_RECORDS,
+                                help='records per output file, 0 writes one file per input')
+    convert_parser.add_argument('--report', help='write a JSON report to this file')
+    convert_parser.add_argument('-q', '--quiet', action='store_true', help='no per-file summary')
+    convert_parser.set_defaults(func=cmd_convert)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import tracemalloc
+from datetime import date
+
+from model.librml import Restriction, RestrictionType
+
+SAMPLES = {
+    RestrictionType.PARTS: dict(parts=['chapter-1']),
+    RestrictionType.GROUP: dict(groups=['staff']),
+    RestrictionType.AGE: dict(minage=18),
+    RestrictionType.LOCATION: dict(subnet=['141.76.0.0/16']),
+    RestrictionType.DATE: dict(fromdate=date(year=2026, month=2, day=11)),
+    RestrictionType.DURATION: dict(duration=14),
+    RestrictionType.COUNT: dict(count=3),
+    RestrictionType.CONCURRENT: dict(sessions=3),
+    RestrictionType.WATERMARK: dict(watermarkvalue='SLUB'),
+    RestrictionType.COMMERCIALUSE: dict(noncommercialuse=True),
+    RestrictionType.QUALITY: dict(maxresolution=1024),
+}
+
+
+def measure(res_type, values, n):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    # every record parses its own lists, so build fresh ones per instance
+    restrictions = [Restriction(res_type=res_type, **{name: list(value) if isinstance(value, list) else value
+                                                      for name, value in values.items()})
+                    for _ in range(n)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del restrictions
+    return size
+
+
+if __name__ == '__main__':
+    n = 100000
+    total = 0
+    for res_type, values in SAMPLES.items():
+        size = measure(res_type, values, n)
+        total += size
+        print('{:<14} {:>8.1f} MiB per million'.format(res_type.name.lower(), size * 1000000 / n / 2 ** 20))
+    print('{:<14} {:>8.1f} MiB per million'.format('mean', total * 1000000 / n / len(SAMPLES) / 2 ** 20))
@@ -0,0 +1,63 @@
+import ipaddress
+import random
+import timeit
+
+from model.decision import Context
+from model.ipindex import SubnetIndex, cache_info
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+
+def random_subnets(n, rnd):
+    subnets = []
+    for _ in range(n):
+        if rnd.random() < 0.9:
+            prefix = rnd.randint(16, 30)
+            address = ipaddress.IPv4Address(rnd.getrandbits(32))
+            subnets.append(str(ipaddress.ip_network('{}/{}'.format(address, prefix), strict=False)))
+        else:
+            prefix = rnd.randint(32, 64)
+            address = ipaddress.IPv6Address(rnd.getrandbits(128))
+            subnets.append(str(ipaddress.ip_network('{}/{}'.format(address, prefix), strict=False)))
+    return subnets
+
+
+def random_ips(n, rnd):
+    return [ipaddress.IPv4Address(rnd.getrandbits(32)) if rnd.random() < 0.9
+            else ipaddress.IPv6Address(rnd.getrandbits(128)) for _ in range(n)]
+
+
+def linear(networks, ip):
+    for network in networks:
+        if ip in network:
+            return True
+    return False
+
+
+if __name__ == '__main__':
+    rnd = random.Random(42)
+    subnets = random_subnets(10000, rnd)
+    ips = random_ips(10000, rnd)
+
+    networks = [ipaddress.ip_network(subnet) for subnet in subnets]
+    index = SubnetIndex(subnets)
+    assert [linear(networks, ip) for ip in ips] == [ip in index for ip in ips]
+
+    build = min(timeit.repeat(lambda: SubnetIndex(subnets), number=1, repeat=3))
+    scan = min(timeit.repeat(lambda: [linear(networks, ip) for ip in ips[:200]], number=1, repeat=3)) * len(ips) / 200
+    lookup = min(timeit.repeat(lambda: [ip in index for ip in ips], number=1, repeat=5))
+
+    print('{} subnets ({} merged ranges), {} lookups'.format(len(subnets), len(index), len(ips)))
+    print('build index:  {:.3f}s'.format(build))
+    print('linear scan:  {:.3f}s (extrapolated)'.format(scan))
+    print('SubnetIndex:  {:.3f}s ({:.0f}x)'.format(lookup, scan / lookup))
+
+    records = []
+    for i in range(100):
+        librml = LibRML(itemid='id-{}'.format(i))
+        librml.actions.append(Action(type=ActionType.READ, permission=True, restrictions=[
+            Restriction(res_type=RestrictionType.LOCATION, subnet=subnets)]))
+        records.append(librml)
+    compile_time = min(timeit.repeat(lambda: [librml.compile() for librml in records], number=1, repeat=3))
+    print('compile {} records sharing the list: {:.3f}s, {}'.format(len(records), compile_time, cache_info()))
+    context = Context(ip=ips[0])
+    print('is_allowed:', records[0].is_allowed(ActionType.READ, context), ips[0] in index)
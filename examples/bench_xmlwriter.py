@@ -0,0 +1,49 @@
+import io
+import timeit
+from datetime import date
+
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+from model.xmlstream import write_xml, write_xml_many
+
+
+def sample(n):
+    records = []
+    for i in range(n):
+        librml = LibRML(itemid='id-{}'.format(i), tenant='http://slub-dresden.de', mention=True,
+                        usageguide='https://creativecommons.org/licenses/by/4.0/', template='Group-Embargo')
+        for atype in ActionType:
+            librml.actions.append(
+                Action(type=atype, permission=True, restrictions=[
+                    Restriction(res_type=RestrictionType.DATE, fromdate=date(year=2026, month=2, day=11)),
+                    Restriction(res_type=RestrictionType.GROUP, groups=['staff', 'students & guests']),
+                ]))
+        records.append(librml)
+    return records
+
+
+def with_elementtree(records):
+    for librml in records:
+        librml.to_xml()
+
+
+def with_writer(records):
+    for librml in records:
+        write_xml(librml, io.StringIO())
+
+
+if __name__ == '__main__':
+    records = sample(2000)
+
+    for librml in records:
+        stream = io.StringIO()
+        write_xml(librml, stream)
+        assert stream.getvalue() == librml.to_xml()
+
+    tree = min(timeit.repeat(lambda: with_elementtree(records), number=1, repeat=5))
+    direct = min(timeit.repeat(lambda: with_writer(records), number=1, repeat=5))
+    bulk = min(timeit.repeat(lambda: write_xml_many(records, io.StringIO()), number=1, repeat=5))
+
+    print('{} records'.format(len(records)))
+    print('LibRML.to_xml:  {:.3f}s'.format(tree))
+    print('write_xml:      {:.3f}s ({:.1f}x)'.format(direct, tree / direct))
+    print('write_xml_many: {:.3f}s ({:.1f}x)'.format(bulk, tree / bulk))
@@ -0,0 +1,150 @@
+import logging
+
+import numpy as np
+
+from model.groups import GroupDictionary
+from model.librml import ActionType, RestrictionType
+
+logger = logging.getLogger(__name__)
+
+ACTION_BITS = {atype: 1 << (atype.value - 1) for atype in ActionType}
+MASK_BITS = 64
+
+
+class RightsTable(object):
+    def __init__(self, records):
+        self.records = list(records)
+        self.size = len(self.records)
+        # group ids are numbered per table, so only the groups this table uses count against MASK_BITS
+        self.groups = GroupDictionary()
+
+        actions = []
+        rule_record = []
+        rule_action = []
+        rule_fromdate = []
+        rule_todate = []
+        rule_minage = []
+        rule_commercial = []
+        rule_noncommercial = []
+        rule_scalar = []
+        rule_clauses = []
+        clause_rule = []
+        clause_mask = []
+        entry_clause = []
+        entry_group = []
+
+        for index, record in enumerate(self.records):
+            mask = 0
+            for action in record.actions:
+                if not action.permission:
+                    continue
+                mask |= ACTION_BITS[action.type]
+                rule = len(rule_record)
+                fromdate = None
+                todate = None
+                minage = 0
+                commercial = True
+                noncommercial = True
+                scalar = False
+                clauses = 0
+                for restriction in action.restrictions:
+                    rtype = restriction.type
+                    if rtype == RestrictionType.DATE:
+                        if restriction.fromdate and (fromdate is None or restriction.fromdate > fromdate):
+                            fromdate = restriction.fromdate
+                        if restriction.todate and (todate is None or restriction.todate < todate):
+                            todate = restriction.todate
+                    elif rtype == RestrictionType.AGE:
+                        if restriction.minage:
+                            minage = max(minage, int(restriction.minage))
+                    elif rtype == RestrictionType.GROUP:
+                        if restriction.groups:
+                            clause = len(clause_rule)
+                            clause_rule.append(rule)
+                            clause_mask.append(self.groups.mask(restriction.groups))
+                            clauses += 1
+                            for group in restriction.groups:
+                                entry_clause.append(clause)
+                                entry_group.append(self.groups.id(group))
+                    elif rtype == RestrictionType.COMMERCIALUSE:
+                        if restriction.commercialuse or restriction.noncommercialuse:
+                            commercial = commercial and bool(restriction.commercialuse)
+                            noncommercial = noncommercial and bool(
+                                restriction.noncommercialuse or restriction.commercialuse)
+                    elif rtype == RestrictionType.LOCATION:
+                        if restriction.subnet or restriction.machines:
+                            scalar = True
+                rule_record.append(index)
+                rule_action.append(ACTION_BITS[action.type])
+                rule_fromdate.append(fromdate)
+                rule_todate.append(todate)
+                rule_minage.append(minage)
+                rule_commercial.append(commercial)
+                rule_noncommercial.append(noncommercial)
+                rule_scalar.append(scalar)
+                rule_clauses.append(clauses)
+            actions.append(mask)
+
+        self.actions = np.array(actions, dtype=np.uint32)
+        self.rule_record = np.array(rule_record, dtype=np.int64)
+        self.rule_action = np.array(rule_action, dtype=np.uint32)
+        self.rule_fromdate = np.array(rule_fromdate, dtype='datetime64[D]')
+        self.rule_todate = np.array(rule_todate, dtype='datetime64[D]')
+        self.rule_minage = np.array(rule_minage, dtype=np.int16)
+        self.rule_commercial = np.array(rule_commercial, dtype=bool)
+        self.rule_noncommercial = np.array(rule_noncommercial, dtype=bool)
+        self.rule_scalar = np.array(rule_scalar, dtype=bool)
+        self.rule_clauses = np.array(rule_clauses, dtype=np.int64)
+        self.clause_rule = np.array(clause_rule, dtype=np.int64)
+        # while every group id fits into a machine word a clause is a single uint64 bitset,
+        # otherwise fall back to the clause/group entry lists
+        self.narrow = len(self.groups) <= MASK_BITS
+        if self.narrow:
+            self.clause_mask = np.array(clause_mask, dtype=np.uint64)
+            self.entry_clause = None
+            self.entry_group = None
+        else:
+            self.clause_mask = None
+            self.entry_clause = np.array(entry_clause, dtype=np.int64)
+            self.entry_group = np.array(entry_group, dtype=np.int64)
+
+    def __len__(self):
+        return self.size
+
+    def permits(self, action):
+        if not isinstance(action, ActionType):
+            action = ActionType.fname(action)
+        return (self.actions & ACTION_BITS[action]) != 0
+
+    def evaluate(self, action, context):
+        if not isinstance(action, ActionType):
+            action = ActionType.fname(action)
+        ok = self.rule_action == ACTION_BITS[action]
+
+        day = np.datetime64(context.date, 'D')
+        ok &= ~(self.rule_fromdate > day)
+        ok &= ~(self.rule_todate < day)
+        if context.age is None:
+            ok &= self.rule_minage == 0
+        else:
+            ok &= self.rule_minage <= context.age
+        ok &= self.rule_commercial if context.commercial else self.rule_noncommercial
+
+        if len(self.clause_rule) > 0:
+            mask = self.groups.lookup(context.groups)[0]
+            if self.narrow:
+                clause_hit = (self.clause_mask & np.uint64(mask)) != 0
+            else:
+                member = np.zeros(len(self.groups), dtype=bool)
+                member[[gid for gid in range(mask.bit_length()) if mask >> gid & 1]] = True
+                clause_hit = np.bincount(self.entry_clause[member[self.entry_group]],
+                                         minlength=len(self.clause_rule)) > 0
+            rule_hits = np.bincount(self.clause_rule[clause_hit], minlength=len(self.rule_record))
+            ok &= rule_hits == self.rule_clauses
+
+        for rule in np.flatnonzero(ok & self.rule_scalar):
+            ok[rule] = self.records[self.rule_record[rule]].is_allowed(action, context)
+
+        result = np.zeros(self.size, dtype=bool)
+        result[self.rule_record[ok]] = True
+        return result
@@ -0,0 +1,253 @@
+import logging
+from datetime import date
+
+from common.errors import LibRMLNotValidError
+from model.librml import LibRML, Action, ActionType, RestrictionType, RESTRICTION_CLASSES, \
+    LISTFIELD, STRFIELD, INTFIELD, BOOLFIELD, DATEFIELD
+
+logger = logging.getLogger(__name__)
+
+BINARY_VERSION = 1
+FRAME_MAGIC = b'LRMLB'
+CHUNK_SIZE = 1 << 16
+
+MENTION_FLAG = 0x01
+SHARE_FLAG = 0x02
+ID_FLAG = 0x04
+TENANT_FLAG = 0x08
+USAGEGUIDE_FLAG = 0x10
+TEMPLATE_FLAG = 0x20
+
+PERMISSION_NONE = 0
+PERMISSION_FALSE = 1
+PERMISSION_TRUE = 2
+RESTRICTIONS_FLAG = 0x40
+
+DATE_EPOCH = date(year=1970, month=1, day=1).toordinal()
+
+ACTION_VALUES = {member.value: member for member in ActionType}
+RESTRICTION_VALUES = {member.value: member for member in RestrictionType}
+DECODE_PLANS = {cls: tuple((i, field.name, field.kind) for i, field in enumerate(cls.codec))
+                for cls in RESTRICTION_CLASSES.values()}
+
+
+def _write_varint(out, n):
+    while n > 0x7f:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, pos):
+    b = data[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7f) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_int(out, n):
+    _write_varint(out, (n << 1) if n >= 0 else ((-n << 1) - 1))
+
+
+def _read_int(data, pos):
+    n, pos = _read_varint(data, pos)
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+
+
+def _write_str(out, s):
+    b = s.encode('utf-8')
+    _write_varint(out, len(b))
+    out += b
+
+
+def _read_str(data, pos):
+    n, pos = _read_varint(data, pos)
+    end = pos + n
+    if end > len(data):
+        raise IndexError(end)
+    return str(data[pos:end], 'utf-8'), end
+
+
+def _encode_restriction(out, restriction):
+    out.append(restriction.type.value)
+    cls = RESTRICTION_CLASSES[restriction.type]
+    flags = 0
+    values = []
+    for i, field in enumerate(cls.codec):
+        value = getattr(restriction, field.name)
+        if field.kind == LISTFIELD:
+            if value:
+                flags |= 1 << i
+                values.append((field.kind, value))
+        elif value is not None:
+            flags |= 1 << i
+            if field.kind == BOOLFIELD:
+                if value:
+                    flags |= 0x10 << i
+            else:
+                values.append((field.kind, value))
+    out.append(flags)
+    for kind, value in values:
+        if kind == LISTFIELD:
+            _write_varint(out, len(value))
+            for item in value:
+                _write_str(out, str(item))
+        elif kind == STRFIELD:
+            _write_str(out, str(value))
+        elif kind == INTFIELD:
+            _write_int(out, int(value))
+        elif kind == DATEFIELD:
+            _write_int(out, value.toordinal() - DATE_EPOCH)
+
+
+def _decode_restriction(data, pos):
+    cls = RESTRICTION_CLASSES[RESTRICTION_VALUES[data[pos]]]
+    flags = data[pos + 1]
+    pos += 2
+    restriction = object.__new__(cls)
+    for i, name, kind in DECODE_PLANS[cls]:
+        if not flags & (1 << i):
+            value = [] if kind == LISTFIELD else None
+        elif kind == LISTFIELD:
+            n, pos = _read_varint(data, pos)
+            value = []
+            for _ in range(n):
+                item, pos = _read_str(data, pos)
+                value.append(item)
+        elif kind == STRFIELD:
+            value, pos = _read_str(data, pos)
+        elif kind == INTFIELD:
+            value, pos = _read_int(data, pos)
+        elif kind == BOOLFIELD:
+            value = bool(flags & (0x10 << i))
+        else:
+            days, pos = _read_int(data, pos)
+            value = date.fromordinal(days + DATE_EPOCH)
+        setattr(restriction, name, value)
+    return restriction, pos
+
+
+def encode(librml):
+    out = bytearray()
+    out.append(BINARY_VERSION)
+    flags = 0
+    if librml.mention:
+        flags |= MENTION_FLAG
+    if librml.sharealike:
+        flags |= SHARE_FLAG
+    strings = []
+    for flag, value in ((ID_FLAG, librml.id), (TENANT_FLAG, librml.tenant),
+                        (USAGEGUIDE_FLAG, librml.usageguide), (TEMPLATE_FLAG, librml.template)):
+        if value is not None:
+            flags |= flag
+            strings.append(value)
+    out.append(flags)
+    for value in strings:
+        _write_str(out, str(value))
+
+    _write_varint(out, len(librml.actions))
+    for action in librml.actions:
+        if action.permission is None:
+            permission = PERMISSION_NONE
+        else:
+            permission = PERMISSION_TRUE if action.permission else PERMISSION_FALSE
+        head = action.type.value | (permission << 4)
+        if len(action.restrictions) > 0:
+            out.append(head | RESTRICTIONS_FLAG)
+            _write_varint(out, len(action.restrictions))
+            for restriction in action.restrictions:
+                _encode_restriction(out, restriction)
+        else:
+            out.append(head)
+    return bytes(out)
+
+
+def _decode(data, pos):
+    if data[pos] != BINARY_VERSION:
+        raise LibRMLNotValidError('Unsupported binary LibRML version {}.'.format(data[pos]))
+    flags = data[pos + 1]
+    pos += 2
+    strings = []
+    for flag in (ID_FLAG, TENANT_FLAG, USAGEGUIDE_FLAG, TEMPLATE_FLAG):
+        if flags & flag:
+            value, pos = _read_str(data, pos)
+        else:
+            value = None
+        strings.append(value)
+    itemid, tenant, usageguide, template = strings
+    librml = LibRML(itemid=itemid, tenant=tenant, mention=bool(flags & MENTION_FLAG),
+                    sharealike=bool(flags & SHARE_FLAG), usageguide=usageguide, template=template)
+
+    count, pos = _read_varint(data, pos)
+    for _ in range(count):
+        head = data[pos]
+        pos += 1
+        permission = (head >> 4) & 0x03
+        action = Action(type=ACTION_VALUES[head & 0x0f],
+                        permission=None if permission == PERMISSION_NONE else permission == PERMISSION_TRUE)
+        if head & RESTRICTIONS_FLAG:
+            n, pos = _read_varint(data, pos)
+            for _ in range(n):
+                restriction, pos = _decode_restriction(data, pos)
+                action.restrictions.append(restriction)
+        librml.actions.append(action)
+    return librml, pos
+
+
+def decode(data):
+    try:
+        librml, pos = _decode(data, 0)
+    except (IndexError, KeyError, UnicodeDecodeError, ValueError, OverflowError) as error:
+        raise LibRMLNotValidError('Binary LibRML is truncated or corrupt: {!r}'.format(error))
+    if pos != len(data):
+        raise LibRMLNotValidError('Binary LibRML has {} trailing bytes.'.format(len(data) - pos))
+    return librml
+
+
+def write_frames(records, fileobj):
+    fileobj.write(FRAME_MAGIC)
+    count = 0
+    for librml in records:
+        data = encode(librml)
+        frame = bytearray()
+        _write_varint(frame, len(data))
+        fileobj.write(bytes(frame) + data)
+        count += 1
+    return count
+
+
+def iter_frames(fileobj, chunk_size: int = CHUNK_SIZE):
+    if fileobj.read(len(FRAME_MAGIC)) != FRAME_MAGIC:
+        raise LibRMLNotValidError('Not a framed binary LibRML file.')
+    buffer = bytearray()
+    pos = 0
+    eof = False
+    while True:
+        try:
+            length, start = _read_varint(buffer, pos)
+            end = start + length
+            if end > len(buffer):
+                raise IndexError(end)
+        except IndexError:
+            if eof:
+                if pos < len(buffer):
+                    raise LibRMLNotValidError('Framed binary LibRML file is truncated.')
+                return
+            del buffer[:pos]
+            pos = 0
+            chunk = fileobj.read(chunk_size)
+            if chunk:
+                buffer += chunk
+            else:
+                eof = True
+            continue
+        yield decode(bytes(buffer[start:end]))
+        pos = end
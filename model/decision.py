@@ -0,0 +1,149 @@
+import datetime
+import ipaddress
+import logging
+
+from common.errors import LibRMLNotValidError
+from model.groups import default_groups
+from model.ipindex import subnet_index
+from model.librml import RestrictionType
+
+logger = logging.getLogger(__name__)
+
+
+class Context(object):
+    def __init__(self, groups=None, age: int = None, ip=None, date: datetime.date = None, commercial: bool = False,
+                 machine: str = None):
+        self.groups = frozenset(groups) if groups is not None else frozenset()
+        self._groupmask = None
+        self._groupsize = None
+        self.age = age
+        if ip is not None and not isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            ip = ipaddress.ip_address(ip)
+        self.ip = ip
+        self.date = date if date is not None else datetime.date.today()
+        self.commercial = commercial
+        self.machine = machine
+
+    @property
+    def groupmask(self):
+        # groups unknown to the dictionary can not match any restriction yet, re-encode once it has grown
+        if self._groupmask is None or (self._groupsize is not None and self._groupsize != len(default_groups)):
+            self._groupmask, complete = default_groups.lookup(self.groups)
+            self._groupsize = None if complete else len(default_groups)
+        return self._groupmask
+
+
+def _compile_group(restriction):
+    if not restriction.groups:
+        return None
+    mask = default_groups.mask(restriction.groups)
+    return lambda ctx: ctx.groupmask & mask != 0
+
+
+def _compile_age(restriction):
+    if not restriction.minage:
+        return None
+    minage = int(restriction.minage)
+    return lambda ctx: ctx.age is not None and ctx.age >= minage
+
+
+def _compile_location(restriction):
+    try:
+        networks = subnet_index(restriction.subnet)
+    except ValueError as error:
+        raise LibRMLNotValidError('Restriction "location" has an invalid subnet: {}'.format(error))
+    machines = frozenset(restriction.machines)
+    if not networks and not machines:
+        return None
+
+    def predicate(ctx):
+        if ctx.ip is not None and ctx.ip in networks:
+            return True
+        return ctx.machine is not None and ctx.machine in machines
+
+    return predicate
+
+
+def _compile_date(restriction):
+    fromdate = restriction.fromdate
+    todate = restriction.todate
+    if fromdate and todate:
+        return lambda ctx: fromdate <= ctx.date <= todate
+    elif fromdate:
+        return lambda ctx: fromdate <= ctx.date
+    elif todate:
+        return lambda ctx: ctx.date <= todate
+    return None
+
+
+def _compile_commercialuse(restriction):
+    commercial = bool(restriction.commercialuse)
+    noncommercial = bool(restriction.noncommercialuse) or commercial
+    if not commercial and not noncommercial:
+        return None
+    return lambda ctx: commercial if ctx.commercial else noncommercial
+
+
+# Restriction types without a compiler (parts, duration, count, concurrent, watermark, quality) describe
+# obligations or usage state, they never deny a request on their own.
+COMPILERS = {
+    RestrictionType.GROUP: _compile_group,
+    RestrictionType.AGE: _compile_age,
+    RestrictionType.LOCATION: _compile_location,
+    RestrictionType.DATE: _compile_date,
+    RestrictionType.COMMERCIALUSE: _compile_commercialuse,
+}
+
+
+def compile_restriction(restriction):
+    compiler = COMPILERS.get(restriction.type)
+    if compiler is not None:
+        return compiler(restriction)
+    return None
+
+
+def _usage_limit(restrictions):
+    count = None
+    sessions = None
+    for restriction in restrictions:
+        if restriction.type == RestrictionType.COUNT and restriction.count is not None:
+            count = int(restriction.count) if count is None else min(count, int(restriction.count))
+        elif restriction.type == RestrictionType.CONCURRENT and restriction.sessions is not None:
+            sessions = int(restriction.sessions) if sessions is None else min(sessions, int(restriction.sessions))
+    return count, sessions
+
+
+class DecisionPlan(object):
+    def __init__(self, actions):
+        rules = {}
+        limits = {}
+        for action in actions:
+            if not action.permission:
+                continue
+            predicates = []
+            for restriction in action.restrictions:
+                predicate = compile_restriction(restriction)
+                if predicate is not None:
+                    predicates.append(predicate)
+            rules.setdefault(action.type, []).append(tuple(predicates))
+            limits.setdefault(action.type, []).append((tuple(predicates), _usage_limit(action.restrictions)))
+        # unrestricted alternatives first, so the common case never touches a predicate
+        self.rules = {atype: tuple(sorted(alternatives, key=len)) for atype, alternatives in rules.items()}
+        self.limits = {atype: tuple(alternatives) for atype, alternatives in limits.items()}
+
+    def is_allowed(self, action_type, context: Context):
+        alternatives = self.rules.get(action_type)
+        if alternatives is None:
+            return False
+        for predicates in alternatives:
+            for predicate in predicates:
+                if not predicate(context):
+                    break
+            else:
+                return True
+        return False
+
+    def usage_limits(self, action_type, context: Context):
+        # the (count, sessions) limits of every alternative the context satisfies, None means unlimited
+        return [limit for predicates, limit in self.limits.get(action_type, ())
+                if all(predicate(context) for predicate in predicates)]
@@ -0,0 +1,135 @@
+import bisect
+import collections
+import logging
+import threading
+import weakref
+
+from model.embargo import date_boundaries
+from model.fingerprint import actions_fingerprint
+from model.librml import ActionType, RestrictionType
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 65536
+
+
+class _Profile(object):
+    __slots__ = ('groups', 'ages', 'location', 'commercial', 'boundaries')
+
+    def __init__(self, actions, action_type, boundaries):
+        groups = set()
+        ages = set()
+        self.location = False
+        self.commercial = False
+        for action in actions:
+            if action.type != action_type or not action.permission:
+                continue
+            for restriction in action.restrictions:
+                if restriction.type == RestrictionType.GROUP:
+                    groups.update(restriction.groups)
+                elif restriction.type == RestrictionType.AGE and restriction.minage:
+                    ages.add(int(restriction.minage))
+                elif restriction.type == RestrictionType.LOCATION and (restriction.subnet or restriction.machines):
+                    self.location = True
+                elif restriction.type == RestrictionType.COMMERCIALUSE:
+                    self.commercial = True
+        self.groups = frozenset(groups)
+        self.ages = tuple(sorted(ages))
+        self.boundaries = tuple(sorted({day for day, kind in boundaries}))
+
+    def context_key(self, context):
+        groups = self.groups.intersection(context.groups) if self.groups else None
+        age = bisect.bisect_right(self.ages, context.age) if self.ages and context.age is not None else None
+        location = (context.ip, context.machine) if self.location else None
+        commercial = bool(context.commercial) if self.commercial else None
+        return groups, age, location, commercial
+
+    def period(self, day):
+        i = bisect.bisect_right(self.boundaries, day)
+        start = self.boundaries[i - 1] if i > 0 else None
+        expires = self.boundaries[i] if i < len(self.boundaries) else None
+        return start, expires
+
+
+class DecisionCache(object):
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.records = weakref.WeakKeyDictionary()
+        self.bodies = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _profile(self, librml, action_type, digest):
+        if digest is None:
+            plan = librml.plan()
+            memo = self.records.get(librml)
+            if memo is None or memo[0] is not plan:
+                # recompute whenever the record was recompiled, the actions may have changed in place
+                memo = self.records[librml] = (plan, actions_fingerprint(librml.actions))
+            digest = memo[1]
+        body = self.bodies.get(digest)
+        if body is None:
+            body = (date_boundaries(librml.actions), {})
+            with self.lock:
+                self.bodies[digest] = body
+                if len(self.bodies) > self.maxsize:
+                    del self.bodies[next(iter(self.bodies))]
+        profile = body[1].get(action_type)
+        if profile is None:
+            profile = body[1][action_type] = _Profile(librml.actions, action_type, body[0].get(action_type, ()))
+        return digest, profile
+
+    def is_allowed(self, librml, action, context, digest: str = None):
+        if not isinstance(action, ActionType):
+            action = ActionType.fname(action)
+        fp, profile = self._profile(librml, action, digest)
+        start, expires = profile.period(context.date)
+        key = (fp, action, start, profile.context_key(context))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[1] is None or context.date < entry[1]:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self.entries[key]
+                self.expired += 1
+            self.misses += 1
+        allowed = librml.is_allowed(action, context)
+        with self.lock:
+            self.entries[key] = (allowed, expires)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return allowed
+
+    def purge(self, day):
+        with self.lock:
+            stale = [key for key, (allowed, expires) in self.entries.items() if expires is not None and expires <= day]
+            for key in stale:
+                del self.entries[key]
+            self.expired += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.records = weakref.WeakKeyDictionary()
+            self.bodies.clear()
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+            self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return dict(hits=self.hits, misses=self.misses, expired=self.expired, evictions=self.evictions,
+                    maxsize=self.maxsize, currsize=len(self.entries),
+                    hitrate=self.hits / lookups if lookups else 0.0)
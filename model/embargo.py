@@ -0,0 +1,132 @@
+import bisect
+import datetime
+import heapq
+import logging
+
+from model.librml import ActionType, RestrictionType
+
+logger = logging.getLogger(__name__)
+
+START = 'start'
+END = 'end'
+
+
+def date_boundaries(actions):
+    boundaries = {}
+    for action in actions:
+        if not action.permission:
+            continue
+        for restriction in action.restrictions:
+            if restriction.type != RestrictionType.DATE:
+                continue
+            if restriction.fromdate:
+                boundaries.setdefault(action.type, set()).add((restriction.fromdate, START))
+            if restriction.todate and restriction.todate < datetime.date.max:
+                # the restriction includes its todate, access ends the day after
+                boundaries.setdefault(action.type, set()).add(
+                    (restriction.todate + datetime.timedelta(days=1), END))
+    return {atype: tuple(sorted(changes)) for atype, changes in boundaries.items()}
+
+
+class EmbargoIndex(object):
+    def __init__(self, records=()):
+        # per action type the distinct boundary days in order and, for each day, its (itemid, kind)
+        # entries. Adding or removing an item costs a dict operation and an O(log d) bisect per
+        # boundary, only a day no other item uses yet costs an O(d) list insert, d distinct days
+        self.dates = {}
+        self.events = {}
+        self.items = {}
+        for librml in records:
+            self.add(librml)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, itemid):
+        return itemid in self.items
+
+    def add(self, librml):
+        if librml.id in self.items:
+            self.remove(librml.id)
+        boundaries = date_boundaries(librml.actions)
+        if not boundaries:
+            return False
+        for atype, changes in boundaries.items():
+            dates = self.dates.setdefault(atype, [])
+            events = self.events.setdefault(atype, {})
+            for day, kind in changes:
+                entries = events.get(day)
+                if entries is None:
+                    entries = events[day] = {}
+                    dates.insert(bisect.bisect_left(dates, day), day)
+                entries[(librml.id, kind)] = None
+        self.items[librml.id] = boundaries
+        return True
+
+    def remove(self, itemid):
+        boundaries = self.items.pop(itemid, None)
+        if boundaries is None:
+            return False
+        for atype, changes in boundaries.items():
+            dates = self.dates[atype]
+            events = self.events[atype]
+            for day, kind in changes:
+                entries = events[day]
+                del entries[(itemid, kind)]
+                if not entries:
+                    del events[day]
+                    del dates[bisect.bisect_left(dates, day)]
+        return True
+
+    def _action_types(self, action):
+        if action is None:
+            return list(self.dates)
+        if not isinstance(action, ActionType):
+            action = ActionType.fname(action)
+        return [action] if action in self.dates else []
+
+    def _range(self, atype, start, end):
+        dates = self.dates[atype]
+        events = self.events[atype]
+        lo = bisect.bisect_left(dates, start) if start is not None else 0
+        hi = bisect.bisect_right(dates, end) if end is not None else len(dates)
+        return ((day, itemid, atype, kind) for day in dates[lo:hi] for itemid, kind in events[day])
+
+    def changes(self, start: datetime.date = None, end: datetime.date = None, action=None):
+        return list(heapq.merge(*[self._range(atype, start, end) for atype in self._action_types(action)],
+                                key=lambda change: change[0]))
+
+    def opening(self, start: datetime.date, end: datetime.date, action=None):
+        return {itemid for day, itemid, atype, kind in self.changes(start, end, action) if kind == START}
+
+    def closing(self, start: datetime.date, end: datetime.date, action=None):
+        return {itemid for day, itemid, atype, kind in self.changes(start, end, action) if kind == END}
+
+    def next_change(self, itemid, after: datetime.date = None, action=None):
+        boundaries = self.items.get(itemid)
+        if boundaries is None:
+            return None
+        after = after if after is not None else datetime.date.today()
+        if action is not None:
+            if not isinstance(action, ActionType):
+                action = ActionType.fname(action)
+            boundaries = {action: boundaries[action]} if action in boundaries else {}
+        upcoming = None
+        for changes in boundaries.values():
+            # an item only has a handful of boundaries, in date order
+            for day, kind in changes:
+                if day > after:
+                    if upcoming is None or day < upcoming:
+                        upcoming = day
+                    break
+        return upcoming
+
+    def next_boundary(self, after: datetime.date = None, action=None):
+        after = after if after is not None else datetime.date.today()
+        upcoming = None
+        for atype in self._action_types(action):
+            dates = self.dates[atype]
+            i = bisect.bisect_right(dates, after)
+            if i < len(dates) and (upcoming is None or dates[i] < upcoming):
+                upcoming = dates[i]
+        return upcoming
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+
+from model.intern import InternPool, SharedList
+from model.librml import LibRML, Action
+from model.names import TYPE, RESTRICTIONS, MENTION, SHARE, USAGEGUIDE, TEMPLATE, ACTIONS
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SIZE = 16
+
+
+def _canonical_restriction(restriction):
+    data = restriction.to_dict()
+    if data is None:
+        return None
+    for name in restriction.lists:
+        if name in data:
+            data[name] = sorted(str(value) for value in data[name])
+    return data
+
+
+def _dumps(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def canonical_actions(actions):
+    canonical = []
+    for action in actions:
+        out = action.to_json()
+        if RESTRICTIONS in out:
+            restrictions = [_canonical_restriction(r) for r in action.restrictions]
+            out[RESTRICTIONS] = sorted((r for r in restrictions if r is not None), key=_dumps)
+            if not out[RESTRICTIONS]:
+                del out[RESTRICTIONS]
+        canonical.append(out)
+    canonical.sort(key=lambda out: (out[TYPE], _dumps(out)))
+    return canonical
+
+
+def canonical(librml):
+    body = {ACTIONS: canonical_actions(librml.actions)}
+    if librml.mention:
+        body[MENTION] = True
+    if librml.sharealike:
+        body[SHARE] = True
+    if librml.usageguide:
+        body[USAGEGUIDE] = str(librml.usageguide)
+    if librml.template:
+        body[TEMPLATE] = str(librml.template)
+    return body
+
+
+def fingerprint(librml):
+    return hashlib.blake2b(_dumps(canonical(librml)).encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def actions_fingerprint(actions):
+    return hashlib.blake2b(_dumps(canonical_actions(actions)).encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+class ContentStore(object):
+    def __init__(self, pool: InternPool = None):
+        self.pool = pool if pool is not None else InternPool()
+        self.bodies = {}
+        self.members = {}
+        self.items = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, itemid):
+        return itemid in self.items
+
+    def put(self, librml):
+        fp = fingerprint(librml)
+        if librml.id in self.items:
+            self.remove(librml.id)
+        if fp not in self.bodies:
+            prototype = LibRML(itemid=None, mention=librml.mention, sharealike=librml.sharealike,
+                               usageguide=librml.usageguide, template=librml.template)
+            prototype.actions = librml.actions
+            self.bodies[fp] = self.pool.intern(prototype)
+            self.members[fp] = set()
+        self.members[fp].add(librml.id)
+        self.items[librml.id] = (fp, librml.tenant)
+        return fp
+
+    def fingerprint(self, itemid):
+        entry = self.items.get(itemid)
+        return entry[0] if entry is not None else None
+
+    def get(self, itemid):
+        entry = self.items.get(itemid)
+        if entry is None:
+            return None
+        fp, tenant = entry
+        body = self.bodies[fp]
+        return LibRML(itemid=itemid, tenant=tenant, mention=body.mention, sharealike=body.sharealike,
+                      usageguide=body.usageguide, template=body.template,
+                      actions=SharedList(Action, body.actions.list))
+
+    def body(self, fp):
+        return self.bodies.get(fp)
+
+    def itemids(self, fp):
+        return frozenset(self.members.get(fp, ()))
+
+    def remove(self, itemid):
+        entry = self.items.pop(itemid, None)
+        if entry is None:
+            return False
+        fp = entry[0]
+        members = self.members[fp]
+        members.discard(itemid)
+        if not members:
+            del self.members[fp]
+            del self.bodies[fp]
+        return True
+
+    def stats(self):
+        return dict(items=len(self.items), bodies=len(self.bodies), interned=len(self.pool))
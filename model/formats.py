@@ -0,0 +1,56 @@
+import logging
+import pathlib
+
+from common.errors import LibRMLNotValidError
+from model.binary import iter_frames, write_frames
+from model.ndjson import iter_ndjson, write_ndjson
+from model.xmlstream import iter_xml, write_xml_many
+
+logger = logging.getLogger(__name__)
+
+XML = 'xml'
+NDJSON = 'ndjson'
+BINARY = 'bin'
+
+SUFFIXES = {
+    '.xml': XML,
+    '.ndjson': NDJSON,
+    '.jsonl': NDJSON,
+    '.lrmlb': BINARY,
+    '.bin': BINARY,
+}
+EXTENSIONS = {XML: '.xml', NDJSON: '.ndjson', BINARY: '.lrmlb'}
+FORMATS = tuple(EXTENSIONS)
+
+
+def detect_format(filename):
+    fmt = SUFFIXES.get(pathlib.PurePath(filename).suffix.lower())
+    if fmt is None:
+        raise LibRMLNotValidError('Can not tell the LibRML format of "{}".'.format(filename))
+    return fmt
+
+
+def iter_records(fileobj, fmt: str, lazy: bool = False, on_error=None):
+    if fmt == XML:
+        return iter_xml(fileobj, lazy=lazy)
+    elif fmt == NDJSON:
+        return iter_ndjson(fileobj, on_error=on_error, lazy=lazy)
+    elif fmt == BINARY:
+        return iter_frames(fileobj)
+    raise ValueError('Unknown LibRML format "{}".'.format(fmt))
+
+
+def write_records(records, fileobj, fmt: str):
+    if fmt == XML:
+        return write_xml_many(records, fileobj)
+    elif fmt == NDJSON:
+        return write_ndjson(records, fileobj)
+    elif fmt == BINARY:
+        return write_frames(records, fileobj)
+    raise ValueError('Unknown LibRML format "{}".'.format(fmt))
+
+
+def read_records(filename, fmt: str = None, lazy: bool = False, on_error=None):
+    fmt = fmt if fmt is not None else detect_format(filename)
+    with open(filename, 'rb') as fileobj:
+        yield from iter_records(fileobj, fmt, lazy=lazy, on_error=on_error)
@@ -0,0 +1,51 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class GroupDictionary(object):
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def id(self, name):
+        gid = self.ids.get(name)
+        if gid is None:
+            with self.lock:
+                gid = self.ids.get(name)
+                if gid is None:
+                    gid = len(self.names)
+                    self.names.append(name)
+                    self.ids[name] = gid
+        return gid
+
+    def mask(self, groups):
+        mask = 0
+        for name in groups:
+            mask |= 1 << self.id(name)
+        return mask
+
+    def lookup(self, groups):
+        mask = 0
+        complete = True
+        for name in groups:
+            gid = self.ids.get(name)
+            if gid is None:
+                complete = False
+            else:
+                mask |= 1 << gid
+        return mask, complete
+
+    def groups(self, mask):
+        return frozenset(name for gid, name in enumerate(self.names) if mask >> gid & 1)
+
+
+default_groups = GroupDictionary()
@@ -0,0 +1,161 @@
+import logging
+import weakref
+
+from model.librml import Action, Restriction, TypedList, RESTRICTION_CLASSES
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+class SharedRestriction(object):
+    __slots__ = ()
+    base = None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Interned restriction is read-only, thaw() it before changing "{}".'.format(name))
+
+    def thaw(self):
+        restriction = object.__new__(self.base)
+        for name in self.base.fields:
+            setattr(restriction, name, _thaw(getattr(self, name)))
+        return restriction
+
+
+SHARED_RESTRICTION_CLASSES = {
+    cls: type('Shared' + cls.__name__, (SharedRestriction, cls), {'__slots__': ('__weakref__',), 'base': cls})
+    for cls in RESTRICTION_CLASSES.values()
+}
+
+
+class SharedAction(Action):
+    def __setattr__(self, name, value):
+        raise AttributeError('Interned action is read-only, thaw() it before changing "{}".'.format(name))
+
+    def thaw(self):
+        return Action(type=self.type, permission=self.permission,
+                      restrictions=TypedList(Restriction, *[r.thaw() for r in self.restrictions]))
+
+
+class SharedBody(object):
+    __slots__ = ('items', '__weakref__')
+
+    def __init__(self, items):
+        self.items = tuple(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class SharedList(TypedList):
+    def __init__(self, oktypes, shared: tuple):
+        self.oktypes = oktypes
+        self.list = shared
+
+    def _own(self):
+        if not isinstance(self.list, list):
+            self.list = list(self.list)
+
+    def __delitem__(self, i):
+        self._own()
+        del self.list[i]
+
+    def __setitem__(self, i, v):
+        self.check(v)
+        self._own()
+        self.list[i] = v
+
+    def insert(self, i, v):
+        self.check(v)
+        self._own()
+        self.list.insert(i, v)
+
+    def append(self, v):
+        self.check(v)
+        self._own()
+        self.list.append(v)
+
+    def thaw(self, i):
+        item = self.list[i]
+        if hasattr(item, 'thaw'):
+            item = item.thaw()
+            self._own()
+            self.list[i] = item
+        return item
+
+    def __str__(self):
+        return str(list(self.list))
+
+
+class InternPool(object):
+    def __init__(self):
+        # entries only live as long as some record still uses them, a shared action keeps its
+        # restrictions alive and a body its actions, so the id() based keys can not be reused
+        self.restrictions = weakref.WeakValueDictionary()
+        self.actions = weakref.WeakValueDictionary()
+        self.bodies = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.actions) + len(self.restrictions)
+
+    def clear(self):
+        self.restrictions.clear()
+        self.actions.clear()
+        self.bodies.clear()
+
+    def restriction(self, restriction: Restriction):
+        cls = RESTRICTION_CLASSES[restriction.type]
+        values = tuple(_freeze(getattr(restriction, name)) for name in cls.fields)
+        key = (cls, values)
+        shared = self.restrictions.get(key)
+        if shared is None:
+            shared = object.__new__(SHARED_RESTRICTION_CLASSES[cls])
+            for name, value in zip(cls.fields, values):
+                object.__setattr__(shared, name, value)
+            shared = self.restrictions.setdefault(key, shared)
+        return shared
+
+    def action(self, action: Action):
+        restrictions = tuple(self.restriction(r) for r in action.restrictions)
+        key = (action.type, action.permission, tuple(id(r) for r in restrictions))
+        shared = self.actions.get(key)
+        if shared is None:
+            shared = SharedAction.__new__(SharedAction)
+            shared.__dict__.update(type=action.type, permission=action.permission, restrictions=restrictions)
+            shared = self.actions.setdefault(key, shared)
+        return shared
+
+    def body(self, actions):
+        shared = SharedBody(self.action(a) for a in actions)
+        return self.bodies.setdefault(tuple(id(a) for a in shared), shared)
+
+    def intern(self, librml):
+        # the shared body holds the same actions, so the record still matches its template
+        templatevars = librml.templatevars
+        librml.actions = SharedList(Action, self.body(librml.actions))
+        librml.templatevars = templatevars
+        librml._plan = None
+        return librml
+
+
+default_pool = InternPool()
+
+
+def intern(librml, pool: InternPool = None):
+    return (pool if pool is not None else default_pool).intern(librml)
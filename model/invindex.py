@@ -0,0 +1,141 @@
+import json
+import logging
+
+from model.decision import compile_restriction
+from model.librml import ActionType, RestrictionType
+
+logger = logging.getLogger(__name__)
+
+
+def _action_type(action):
+    if not isinstance(action, ActionType):
+        action = ActionType.fname(action)
+    return action
+
+
+def _restriction_type(restriction_type):
+    if not isinstance(restriction_type, RestrictionType):
+        restriction_type = RestrictionType.fname(restriction_type)
+    return restriction_type
+
+
+class _Clause(set):
+    # the items sharing one restricted, group-free alternative, checked once per query
+    __slots__ = ('predicates',)
+
+    def __init__(self, predicates):
+        super().__init__()
+        self.predicates = predicates
+
+
+def _clause_key(restrictions):
+    return tuple(sorted(json.dumps(restriction.to_dict(), sort_keys=True, default=str)
+                        for restriction in restrictions))
+
+
+class RightsIndex(object):
+    def __init__(self, records=()):
+        self.records = {}
+        self.keys = {}
+        self.permissions = {}
+        self.unrestricted = {}
+        self.groups = {}
+        self.restrictions = {}
+        self.gates = {}
+        self.clauses = {}
+        for librml in records:
+            self.add(librml)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, itemid):
+        return itemid in self.records
+
+    def _post(self, postings, key, itemid, keys):
+        postings.setdefault(key, set()).add(itemid)
+        keys.append((postings, key))
+
+    def add(self, librml):
+        itemid = librml.id
+        if itemid in self.records:
+            self.remove(itemid)
+        keys = []
+        for action in librml.actions:
+            atype = action.type
+            self._post(self.permissions, (atype, action.permission), itemid, keys)
+            if not action.permission:
+                continue
+            gate = None
+            restrictive = []
+            predicates = []
+            for restriction in action.restrictions:
+                self._post(self.restrictions, (atype, restriction.type), itemid, keys)
+                predicate = compile_restriction(restriction)
+                if predicate is None:
+                    continue
+                restrictive.append(restriction)
+                predicates.append(predicate)
+                if restriction.type == RestrictionType.GROUP:
+                    for group in restriction.groups:
+                        self._post(self.groups, (atype, group), itemid, keys)
+                    if gate is None or len(restriction.groups) < len(gate):
+                        gate = restriction.groups
+            if not restrictive:
+                self._post(self.unrestricted, atype, itemid, keys)
+            elif gate is not None:
+                # every group restriction must match, so the narrowest one is enough to select candidates
+                for group in gate:
+                    self._post(self.gates, (atype, group), itemid, keys)
+            else:
+                # records from one template share their alternatives, so a query evaluates each
+                # distinct alternative once instead of every record
+                clauses = self.clauses.setdefault(atype, {})
+                key = _clause_key(restrictive)
+                if key not in clauses:
+                    clauses[key] = _Clause(tuple(predicates))
+                self._post(clauses, key, itemid, keys)
+        self.records[itemid] = librml
+        self.keys[itemid] = keys
+
+    def remove(self, itemid):
+        if itemid not in self.records:
+            return False
+        del self.records[itemid]
+        for postings, key in self.keys.pop(itemid):
+            items = postings.get(key)
+            if items is not None:
+                items.discard(itemid)
+                if not items:
+                    del postings[key]
+        return True
+
+    def items(self, action, permission: bool = True):
+        return frozenset(self.permissions.get((_action_type(action), permission), ()))
+
+    def unrestricted_items(self, action):
+        return frozenset(self.unrestricted.get(_action_type(action), ()))
+
+    def with_group(self, group, action):
+        return frozenset(self.groups.get((_action_type(action), group), ()))
+
+    def with_restriction(self, restriction_type, action):
+        return frozenset(self.restrictions.get((_action_type(action), _restriction_type(restriction_type)), ()))
+
+    def candidates(self, action, context):
+        atype = _action_type(action)
+        candidates = set()
+        for group in context.groups:
+            candidates.update(self.gates.get((atype, group), ()))
+        return candidates
+
+    def allowed(self, action, context):
+        atype = _action_type(action)
+        allowed = set(self.unrestricted.get(atype, ()))
+        for clause in self.clauses.get(atype, {}).values():
+            if all(predicate(context) for predicate in clause.predicates):
+                allowed.update(clause)
+        for itemid in self.candidates(atype, context):
+            if itemid not in allowed and self.records[itemid].is_allowed(atype, context):
+                allowed.add(itemid)
+        return allowed
@@ -0,0 +1,69 @@
+import bisect
+import functools
+import ipaddress
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 4096
+
+
+class SubnetIndex(object):
+    __slots__ = ('tables', 'size')
+
+    def __init__(self, subnets):
+        ranges = {4: [], 6: []}
+        for subnet in subnets:
+            network = subnet if isinstance(subnet, (ipaddress.IPv4Network, ipaddress.IPv6Network)) \
+                else ipaddress.ip_network(subnet, strict=False)
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+        self.tables = {}
+        self.size = 0
+        for version, intervals in ranges.items():
+            if not intervals:
+                continue
+            intervals.sort()
+            starts = []
+            ends = []
+            for start, end in intervals:
+                # merge overlapping and adjacent ranges, so every address falls into at most one interval
+                if ends and start <= ends[-1] + 1:
+                    if end > ends[-1]:
+                        ends[-1] = end
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self.tables[version] = (starts, ends)
+            self.size += len(starts)
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __contains__(self, ip):
+        if not isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            ip = ipaddress.ip_address(ip)
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        table = self.tables.get(ip.version)
+        if table is None:
+            return False
+        starts, ends = table
+        n = int(ip)
+        i = bisect.bisect_right(starts, n) - 1
+        return i >= 0 and n <= ends[i]
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _shared_index(subnets: tuple):
+    return SubnetIndex(subnets)
+
+
+def subnet_index(subnets):
+    return _shared_index(tuple(subnets))
+
+
+def cache_info():
+    return _shared_index.cache_info()
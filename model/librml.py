@@ -1,6 +1,7 @@
-import collections
+import collections.abc
 import json
 import logging
+import threading
 import xml.etree.ElementTree as ET
 from datetime import date
 from enum import Enum, unique
@@ -10,12 +11,15 @@ from common.errors import LibRMLNotValidError, ZHSerError
 from model.names import SUBNET, GROUPS, PARTS, MINAGE, INSIDE, OUTSIDE, MACHINES, FROMDATE, TODATE, DURATION, COUNT, \
     SESSIONS, WATERMARK, COMMERCIAL, NONCOMMERCIAL, MAXRES, MAXBIT, TYPE, XRESTRICTION, XPART, XGROUP, XSUBNET, \
     PERMISSION, RESTRICTIONS, XACTION, TENANT, MENTION, SHARE, USAGEGUIDE, ACTIONS, LIBRML, ITEM, ID, VERSION, XMACHINE, \
-    TEMPLATE
+    TEMPLATE, XVERSION, XCOMMENT
 
 logger = logging.getLogger(__name__)
 
+# only guards publishing loaded actions, loaders run outside of it so records materialize in parallel
+_LOAD_LOCK = threading.Lock()
 
-class TypedList(collections.MutableSequence):
+
+class TypedList(collections.abc.MutableSequence):
     def __init__(self, oktypes, *args):
         self.oktypes = oktypes
         self.list = list()
@@ -42,6 +46,10 @@ class TypedList(collections.MutableSequence):
         self.check(v)
         self.list.insert(i, v)
 
+    def append(self, v):
+        self.check(v)
+        self.list.append(v)
+
     def __str__(self):
         return str(self.list)
 
@@ -66,14 +74,13 @@ class ActionType(Enum):
     @classmethod
     def fname(cls, name):
         try:
-            return [member for membername, member in cls.__members__.items()
-                    if member.name.lower() == name.lower()].pop()
-        except IndexError:
+            return ACTION_TYPES[name.lower()]
+        except KeyError:
             raise ValueError('ActionType has no member "{}"'.format(name))
 
     @classmethod
     def getnames(cls):
-        return [name.lower() for name, member in cls.__members__.items()]
+        return list(ACTION_TYPES)
 
 
 @unique
@@ -93,233 +100,248 @@ class RestrictionType(Enum):
     @classmethod
     def fname(cls, name):
         try:
-            return [member for membername, member in cls.__members__.items()
-                    if member.name.lower() == name.lower()].pop()
-        except IndexError:
+            return RESTRICTION_TYPES[name.lower()]
+        except KeyError:
             raise ValueError('RestrictionType has no member "{}"'.format(name))
 
     @classmethod
     def getnames(cls):
-        return [name.lower() for name, member in cls.__members__.items()]
+        return list(RESTRICTION_TYPES)
+
+
+ACTION_NAMES = {member: member.name.lower() for member in ActionType}
+ACTION_TYPES = {name: member for member, name in ACTION_NAMES.items()}
+RESTRICTION_NAMES = {member: member.name.lower() for member in RestrictionType}
+RESTRICTION_TYPES = {name: member for member, name in RESTRICTION_NAMES.items()}
+
+LISTFIELD = 'list'
+STRFIELD = 'str'
+INTFIELD = 'int'
+BOOLFIELD = 'bool'
+DATEFIELD = 'date'
+
+
+def _identity(value):
+    return value
+
+
+def _xml_int(value):
+    return int(value) if value else None
+
+
+def _xml_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+def _xml_bool(value):
+    return value == 'true'
+
+
+def _xml_bool_str(value):
+    return str(value).lower()
+
+
+JSON_ENCODERS = {LISTFIELD: list, STRFIELD: _identity, INTFIELD: int, BOOLFIELD: _identity, DATEFIELD: str}
+JSON_DECODERS = {LISTFIELD: _identity, STRFIELD: _identity, INTFIELD: int, BOOLFIELD: _identity,
+                 DATEFIELD: date.fromisoformat}
+XML_ENCODERS = {STRFIELD: str, INTFIELD: str, BOOLFIELD: _xml_bool_str, DATEFIELD: str}
+XML_DECODERS = {STRFIELD: _identity, INTFIELD: _xml_int, BOOLFIELD: _xml_bool, DATEFIELD: _xml_date}
+
+
+class Field(object):
+    __slots__ = ('name', 'kind', 'tag')
+
+    def __init__(self, name: str, kind: str, tag: str = None):
+        self.name = name
+        self.kind = kind
+        self.tag = tag
+
+
+RESTRICTION_CLASSES = {}
+RESTRICTION_FIELDS = set()
+# positional order of the single Restriction class this hierarchy replaced
+RESTRICTION_POSITIONAL = (SUBNET, GROUPS, PARTS, MINAGE, INSIDE, OUTSIDE, MACHINES, FROMDATE, TODATE, DURATION, COUNT,
+                          SESSIONS, WATERMARK, COMMERCIAL, NONCOMMERCIAL, MAXRES, MAXBIT)
 
 
 class Restriction:
-    def __init__(self, res_type, subnet: List[str] = None, groups: List[str] = None, parts: List[str] = None,
-                 minage: int = None, inside: str = None, outside: str = None, machines: List[str] = None,
-                 fromdate: date = None, todate: date = None, duration: int = None, count: int = None,
-                 sessions: int = None, watermarkvalue: str = None, commercialuse: bool = None,
-                 noncommercialuse: bool = None, maxresolution: int = None, maxbitrate: int = None):
-
-        if res_type in RestrictionType:
-            self.type = res_type
-        else:
-            raise TypeError()
-
-        self.subnet = subnet if subnet is not None else []
-        self.groups = groups if groups is not None else []
-        self.parts = parts if parts is not None else []
-        self.minage = minage
-        self.inside = inside
-        self.outside = outside
-        self.machines = machines if machines is not None else []
-        self.fromdate = fromdate
-        self.todate = todate
-        self.duration = duration
-        self.count = count
-        self.sessions = sessions
-        self.watermarkvalue = watermarkvalue
-        self.commercialuse = commercialuse
-        self.noncommercialuse = noncommercialuse
-        self.maxresolution = maxresolution
-        self.maxbitrate = maxbitrate
+    __slots__ = ()
+    type = None
+    codec = ()
+    xmlorder = None
+
+    subnet = ()
+    groups = ()
+    parts = ()
+    machines = ()
+    minage = None
+    inside = None
+    outside = None
+    fromdate = None
+    todate = None
+    duration = None
+    count = None
+    sessions = None
+    watermarkvalue = None
+    commercialuse = None
+    noncommercialuse = None
+    maxresolution = None
+    maxbitrate = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'type' not in cls.__dict__:
+            return
+        by_name = {field.name: field for field in cls.codec}
+        xmlorder = cls.xmlorder if cls.xmlorder is not None else [field.name for field in cls.codec]
+        cls.tname = RESTRICTION_NAMES[cls.type]
+        cls.fields = tuple(by_name)
+        cls.lists = tuple(field.name for field in cls.codec if field.kind == LISTFIELD)
+        cls.json_encoders = tuple((field.name, JSON_ENCODERS[field.kind]) for field in cls.codec)
+        cls.json_decoders = tuple((field.name, JSON_DECODERS[field.kind]) for field in cls.codec)
+        cls.xml_encoders = tuple((name, XML_ENCODERS[by_name[name].kind]) for name in xmlorder
+                                 if by_name[name].kind != LISTFIELD)
+        cls.xml_decoders = tuple((field.name, XML_DECODERS[field.kind]) for field in cls.codec
+                                 if field.kind != LISTFIELD)
+        cls.xml_children = tuple((field.name, field.tag) for field in cls.codec if field.kind == LISTFIELD)
+        RESTRICTION_CLASSES[cls.type] = cls
+        RESTRICTION_FIELDS.update(cls.fields)
+
+    def __new__(cls, res_type=None, *args, **kwargs):
+        if cls is Restriction:
+            cls = RESTRICTION_CLASSES.get(res_type) if isinstance(res_type, RestrictionType) else None
+            if cls is None:
+                raise TypeError()
+        return object.__new__(cls)
+
+    def __init__(self, res_type=None, *args, **kwargs):
+        if len(args) > len(RESTRICTION_POSITIONAL):
+            raise TypeError('Restriction takes at most {} positional arguments'
+                            .format(len(RESTRICTION_POSITIONAL) + 1))
+        for name, value in zip(RESTRICTION_POSITIONAL, args):
+            if name in kwargs:
+                raise TypeError('Restriction got multiple values for argument "{}"'.format(name))
+            kwargs[name] = value
+        for name in self.fields:
+            value = kwargs.pop(name, None)
+            if value is None and name in self.lists:
+                value = []
+            setattr(self, name, value)
+        for name in kwargs:
+            if name not in RESTRICTION_FIELDS:
+                raise TypeError('Restriction got an unexpected keyword argument "{}"'.format(name))
 
     def to_dict(self):
-        if self.type == RestrictionType.PARTS:
-            if len(self.parts) > 0:
-                return {TYPE: self.type.name.lower(), PARTS: self.parts}
-        elif self.type == RestrictionType.GROUP:
-            if len(self.groups) > 0:
-                return {TYPE: self.type.name.lower(), GROUPS: self.groups}
-        elif self.type == RestrictionType.AGE:
-            if self.minage:
-                return {TYPE: self.type.name.lower(), MINAGE: self.minage}
-        elif self.type == RestrictionType.LOCATION:
-            out = {TYPE: self.type.name.lower()}
-            if self.inside:
-                out[INSIDE] = self.inside
-            if self.outside:
-                out[OUTSIDE] = self.outside
-            if len(self.subnet) > 0:
-                out[SUBNET] = self.subnet
-            if len(self.machines) > 0:
-                out[MACHINES] = self.machines
-            if self.inside or self.outside or len(self.subnet) > 0 or len(self.machines) > 0:
-                return out
-        elif self.type == RestrictionType.DATE:
-            out = {TYPE: self.type.name.lower()}
-            if self.fromdate:
-                out[FROMDATE] = str(self.fromdate)
-            if self.todate:
-                out[TODATE] = str(self.todate)
-            if self.todate or self.fromdate:
-                return out
-        elif self.type == RestrictionType.DURATION:
-            if self.duration:
-                return {TYPE: self.type.name.lower(), DURATION: int(self.duration)}
-        elif self.type == RestrictionType.COUNT:
-            if self.count:
-                return {TYPE: self.type.name.lower(), COUNT: int(self.count)}
-        elif self.type == RestrictionType.CONCURRENT:
-            if self.sessions:
-                return {TYPE: self.type.name.lower(), SESSIONS: int(self.sessions)}
-        elif self.type == RestrictionType.WATERMARK:
-            if self.watermarkvalue:
-                return {TYPE: self.type.name.lower(), WATERMARK: self.watermarkvalue}
-        elif self.type == RestrictionType.COMMERCIALUSE:
-            out = {TYPE: self.type.name.lower()}
-            if self.commercialuse:
-                out[COMMERCIAL] = self.commercialuse
-            if self.noncommercialuse:
-                out[NONCOMMERCIAL] = self.noncommercialuse
-            if self.commercialuse or self.noncommercialuse:
-                return out
-        elif self.type == RestrictionType.QUALITY:
-            out = {TYPE: self.type.name.lower()}
-            if self.maxresolution:
-                out[MAXRES] = int(self.maxresolution)
-            if self.maxbitrate:
-                out[MAXBIT] = int(self.maxbitrate)
-            if self.maxresolution or self.maxbitrate:
-                return out
+        out = {TYPE: self.tname}
+        for name, encode in self.json_encoders:
+            value = getattr(self, name)
+            if value:
+                out[name] = encode(value)
+        if len(out) > 1:
+            return out
+
+    def xml_content(self):
+        attributes = [(TYPE, self.tname)]
+        for name, encode in self.xml_encoders:
+            value = getattr(self, name)
+            if value:
+                attributes.append((name, encode(value)))
+        children = []
+        for name, tag in self.xml_children:
+            for value in getattr(self, name):
+                children.append((tag, str(value) if value is not None else None))
+        return attributes, children
 
     def to_xml(self):
-        x = ET.Element(XRESTRICTION, {TYPE: self.type.name.lower()})
-
-        if self.type == RestrictionType.PARTS:
-            for part in self.parts:
-                p = ET.SubElement(x, XPART)
-                p.text = part
-        elif self.type == RestrictionType.GROUP:
-            for group in self.groups:
-                g = ET.SubElement(x, XGROUP)
-                g.text = group
-        elif self.type == RestrictionType.AGE:
-            if self.minage:
-                x.set(MINAGE, str(self.minage))
-        elif self.type == RestrictionType.LOCATION:
-            if self.inside:
-                x.set(INSIDE, self.inside)
-            if self.outside:
-                x.set(OUTSIDE, self.outside)
-            for n in self.subnet:
-                xn = ET.SubElement(x, XSUBNET)
-                xn.text = str(n)
-            for m in self.machines:
-                xm = ET.SubElement(x, XMACHINE)
-                xm.text = str(m)
-        elif self.type == RestrictionType.DATE:
-            if self.todate:
-                x.set(TODATE, str(self.todate))
-            if self.fromdate:
-                x.set(FROMDATE, str(self.fromdate))
-        elif self.type == RestrictionType.DURATION:
-            if self.duration:
-                x.set(DURATION, str(self.duration))
-        elif self.type == RestrictionType.COUNT:
-            if self.count:
-                x.set(COUNT, str(self.count))
-        elif self.type == RestrictionType.CONCURRENT:
-            if self.sessions:
-                x.set(SESSIONS, str(self.sessions))
-        elif self.type == RestrictionType.WATERMARK:
-            if self.watermarkvalue:
-                x.set(WATERMARK, self.watermarkvalue)
-        elif self.type == RestrictionType.COMMERCIALUSE:
-            if self.commercialuse:
-                x.set(COMMERCIAL, str(self.commercialuse).lower())
-            if self.noncommercialuse:
-                x.set(NONCOMMERCIAL, str(self.noncommercialuse).lower())
-        elif self.type == RestrictionType.QUALITY:
-            if self.maxbitrate:
-                x.set(MAXBIT, str(self.maxbitrate))
-            if self.maxresolution:
-                x.set(MAXRES, str(self.maxresolution))
-        else:
-            return None
-
+        attributes, children = self.xml_content()
+        x = ET.Element(XRESTRICTION, dict(attributes))
+        for tag, text in children:
+            c = ET.SubElement(x, tag)
+            c.text = text
         return x
 
     def from_dict(self, restriction):
-        if PARTS in restriction:
-            self.parts = restriction[PARTS]
-        if GROUPS in restriction:
-            self.groups = restriction[GROUPS]
-        if MINAGE in restriction:
-            self.minage = restriction[MINAGE]
-        if INSIDE in restriction:
-            self.inside = restriction[INSIDE]
-        if OUTSIDE in restriction:
-            self.outside = restriction[OUTSIDE]
-        if SUBNET in restriction:
-            self.subnet = restriction[SUBNET]
-        if MACHINES in restriction:
-            self.machines = restriction[MACHINES]
-        if FROMDATE in restriction:
-            self.fromdate = date.fromisoformat(restriction[FROMDATE])
-        if TODATE in restriction:
-            self.todate = date.fromisoformat(restriction[TODATE])
-        if DURATION in restriction:
-            self.duration = int(restriction[DURATION])
-        if COUNT in restriction:
-            self.count = int(restriction[COUNT])
-        if SESSIONS in restriction:
-            self.sessions = int(restriction[SESSIONS])
-        if WATERMARK in restriction:
-            self.watermarkvalue = restriction[WATERMARK]
-        if COMMERCIAL in restriction:
-            self.commercialuse = restriction[COMMERCIAL]
-        if NONCOMMERCIAL in restriction:
-            self.noncommercialuse = restriction[NONCOMMERCIAL]
-        if MAXRES in restriction:
-            self.maxresolution = restriction[MAXRES]
-        if MAXBIT in restriction:
-            self.maxbitrate = restriction[MAXBIT]
+        for name, decode in self.json_decoders:
+            if name in restriction:
+                setattr(self, name, decode(restriction[name]))
 
     def from_xml(self, restriction_node):
-        if self.type == RestrictionType.PARTS:
-            for part in restriction_node.iterfind(XPART):
-                self.parts.append(part.text)
-        if self.type == RestrictionType.GROUP:
-            for group in restriction_node.iterfind(XGROUP):
-                self.groups.append(group.text)
-        if self.type == RestrictionType.AGE:
-            self.minage = restriction_node.attrib.get(MINAGE)
-        if self.type == RestrictionType.LOCATION:
-            self.inside = restriction_node.attrib.get(INSIDE)
-            self.outside = restriction_node.attrib.get(OUTSIDE)
-            for subnet in restriction_node.iterfind(XSUBNET):
-                self.subnet.append(subnet.text)
-            for machine in restriction_node.iterfind(XMACHINE):
-                self.machines.append(machine.text)
-        if self.type == RestrictionType.DATE:
-            if restriction_node.attrib.get(FROMDATE):
-                self.fromdate = date.fromisoformat(restriction_node.attrib.get(FROMDATE))
-            if restriction_node.attrib.get(TODATE):
-                self.todate = date.fromisoformat(restriction_node.attrib.get(TODATE))
-        if self.type == RestrictionType.DURATION:
-            self.duration = int(restriction_node.attrib.get(DURATION))
-        if self.type == RestrictionType.COUNT:
-            self.count = int(restriction_node.attrib.get(COUNT))
-        if self.type == RestrictionType.CONCURRENT:
-            self.sessions = int(restriction_node.attrib.get(SESSIONS))
-        if self.type == RestrictionType.WATERMARK:
-            self.watermarkvalue = restriction_node.attrib.get(WATERMARK)
-        if self.type == RestrictionType.COMMERCIALUSE:
-            self.commercialuse = restriction_node.attrib.get(COMMERCIAL) == 'true'
-            self.noncommercialuse = restriction_node.attrib.get(NONCOMMERCIAL) == 'true'
-        if self.type == RestrictionType.QUALITY:
-            self.maxbitrate = restriction_node.attrib.get(MAXBIT)
-            self.maxresolution = restriction_node.attrib.get(MAXRES)
+        attrib = restriction_node.attrib
+        for name, decode in self.xml_decoders:
+            setattr(self, name, decode(attrib.get(name)))
+        for name, tag in self.xml_children:
+            values = getattr(self, name)
+            for child in restriction_node.iterfind(tag):
+                values.append(child.text)
+
+
+class PartsRestriction(Restriction):
+    __slots__ = ('parts',)
+    type = RestrictionType.PARTS
+    codec = (Field(PARTS, LISTFIELD, XPART),)
+
+
+class GroupRestriction(Restriction):
+    __slots__ = ('groups',)
+    type = RestrictionType.GROUP
+    codec = (Field(GROUPS, LISTFIELD, XGROUP),)
+
+
+class AgeRestriction(Restriction):
+    __slots__ = ('minage',)
+    type = RestrictionType.AGE
+    codec = (Field(MINAGE, INTFIELD),)
+
+
+class LocationRestriction(Restriction):
+    __slots__ = ('inside', 'outside', 'subnet', 'machines')
+    type = RestrictionType.LOCATION
+    codec = (Field(INSIDE, STRFIELD), Field(OUTSIDE, STRFIELD), Field(SUBNET, LISTFIELD, XSUBNET),
+             Field(MACHINES, LISTFIELD, XMACHINE))
+
+
+class DateRestriction(Restriction):
+    __slots__ = ('fromdate', 'todate')
+    type = RestrictionType.DATE
+    codec = (Field(FROMDATE, DATEFIELD), Field(TODATE, DATEFIELD))
+    xmlorder = (TODATE, FROMDATE)
+
+
+class DurationRestriction(Restriction):
+    __slots__ = ('duration',)
+    type = RestrictionType.DURATION
+    codec = (Field(DURATION, INTFIELD),)
+
+
+class CountRestriction(Restriction):
+    __slots__ = ('count',)
+    type = RestrictionType.COUNT
+    codec = (Field(COUNT, INTFIELD),)
+
+
+class ConcurrentRestriction(Restriction):
+    __slots__ = ('sessions',)
+    type = RestrictionType.CONCURRENT
+    codec = (Field(SESSIONS, INTFIELD),)
+
+
+class WatermarkRestriction(Restriction):
+    __slots__ = ('watermarkvalue',)
+    type = RestrictionType.WATERMARK
+    codec = (Field(WATERMARK, STRFIELD),)
+
+
+class CommercialUseRestriction(Restriction):
+    __slots__ = ('commercialuse', 'noncommercialuse')
+    type = RestrictionType.COMMERCIALUSE
+    codec = (Field(COMMERCIAL, BOOLFIELD), Field(NONCOMMERCIAL, BOOLFIELD))
+
+
+class QualityRestriction(Restriction):
+    __slots__ = ('maxresolution', 'maxbitrate')
+    type = RestrictionType.QUALITY
+    codec = (Field(MAXRES, INTFIELD), Field(MAXBIT, INTFIELD))
+    xmlorder = (MAXBIT, MAXRES)
 
 
 class Action:
@@ -336,7 +358,7 @@ class Action:
             raise TypeError
 
     def to_json(self):
-        output = dict(type=self.type.name.lower())
+        output = {TYPE: ACTION_NAMES[self.type]}
         if self.permission:
             output[PERMISSION] = self.permission
 
@@ -350,10 +372,14 @@ class Action:
             output[RESTRICTIONS] = rstring
         return output
 
-    def to_xml(self):
-        a = ET.Element(XACTION, {TYPE: self.type.name.lower()})
+    def xml_attributes(self):
+        attributes = [(TYPE, ACTION_NAMES[self.type])]
         if self.permission:
-            a.set(PERMISSION, str(self.permission).lower())
+            attributes.append((PERMISSION, str(self.permission).lower()))
+        return attributes
+
+    def to_xml(self):
+        a = ET.Element(XACTION, dict(self.xml_attributes()))
 
         if len(self.restrictions) > 0:
             for restriction in self.restrictions:
@@ -400,6 +426,58 @@ class Action:
         return action
 
 
+def _action_from_dict(action_type, data):
+    action = Action(action_type)
+    action.from_dict(data)
+    return action
+
+
+def _check_actions(actions):
+    # a deferred record is only decoded on first use, so at least its shape has to be valid up front
+    if not isinstance(actions, list):
+        raise LibRMLNotValidError('Attribute "{}" is not a list.'.format(ACTIONS))
+    for action in actions:
+        if not isinstance(action, dict) or TYPE not in action:
+            raise LibRMLNotValidError('Action has no attribute "{}".'.format(TYPE))
+        restrictions = action.get(RESTRICTIONS, [])
+        if not isinstance(restrictions, list) or \
+                not all(isinstance(restriction, dict) and TYPE in restriction for restriction in restrictions):
+            raise LibRMLNotValidError('Restriction inside Action has no attribute "{}".'.format(TYPE))
+        for restriction in restrictions:
+            name = restriction[TYPE]
+            if not isinstance(name, str) or name.lower() not in RESTRICTION_TYPES:
+                raise LibRMLNotValidError('RestrictionType has no member "{}"'.format(name))
+
+
+def _action_from_xml(action_type, action_node):
+    action = Action(type=action_type)
+    action.from_xml(action_node)
+    return action
+
+
+class DeferredActions(object):
+    __slots__ = ('entries', 'decode', 'decoded')
+
+    def __init__(self, entries, decode):
+        self.entries = entries
+        self.decode = decode
+        self.decoded = {}
+
+    def _action(self, i):
+        action = self.decoded.get(i)
+        if action is None:
+            action_type, raw = self.entries[i]
+            # keep the first decoded action when two threads decode the same entry
+            action = self.decoded.setdefault(i, self.decode(action_type, raw))
+        return action
+
+    def of(self, action_type):
+        return [self._action(i) for i, (t, raw) in enumerate(self.entries) if t == action_type]
+
+    def __call__(self):
+        return TypedList(Action, *[self._action(i) for i in range(len(self.entries))])
+
+
 class LibRML(object):
     def __init__(self, itemid: str, tenant: str = None, mention: bool = False, sharealike: bool = False,
                  usageguide: str = None, template: str = None, actions: List[Action] = None):
@@ -409,12 +487,59 @@ class LibRML(object):
         self.sharealike = sharealike
         self.usageguide = usageguide
         self.template = template
+        self.templatevars = None
         if actions is not None:
             self.actions = actions
         else:
             self.actions = TypedList(Action)
 
-    def to_dict(self):
+    @property
+    def actions(self):
+        actions = self._actions
+        while actions is None:
+            loader = self._loader
+            if loader is None:
+                actions = self._actions
+                continue
+            # threads racing on one record may both decode, the first result is kept for all of them
+            loaded = loader()
+            with _LOAD_LOCK:
+                if self._actions is None and self._loader is loader:
+                    self._actions = loaded
+                    self._loader = None
+                actions = self._actions
+        return actions
+
+    @actions.setter
+    def actions(self, actions):
+        self._actions = actions
+        self._loader = None
+        self._plan = None
+        # the new actions need not match the template any more
+        self.templatevars = None
+
+    def defer_actions(self, loader):
+        with _LOAD_LOCK:
+            self._loader = loader
+            self._actions = None
+            self._plan = None
+        self.templatevars = None
+
+    def is_materialized(self):
+        return self._actions is not None
+
+    def _can_defer(self):
+        return self._actions is not None and len(self._actions) == 0
+
+    def actions_of(self, action_type):
+        if not isinstance(action_type, ActionType):
+            action_type = ActionType.fname(action_type)
+        loader = self._loader
+        if self._actions is None and isinstance(loader, DeferredActions):
+            return loader.of(action_type)
+        return [action for action in self.actions if action.type == action_type]
+
+    def to_dict(self, with_actions: bool = True):
         output = {ID: self.id}
 
         if self.tenant:
@@ -427,48 +552,68 @@ class LibRML(object):
             output[USAGEGUIDE] = self.usageguide
         if self.template:
             output[TEMPLATE] = self.template
-        if len(self.actions) > 0:
+        if with_actions and len(self.actions) > 0:
             astring = []
             for action in self.actions:
                 astring.append(action.to_json())
             output[ACTIONS] = astring
         return output
 
-    def to_xml(self):
-        root = ET.Element(LIBRML)
-        root.set('version', VERSION)
-        root.append(ET.Comment(' This XML is created using the libRML Python code '))
-        item = ET.SubElement(root, ITEM, {ID: self.id})
-
+    def xml_attributes(self):
+        attributes = [(ID, self.id)]
         if self.tenant:
-            item.set(TENANT, str(self.tenant))
+            attributes.append((TENANT, str(self.tenant)))
         if self.mention:
-            item.set(MENTION, str(self.mention).lower())
+            attributes.append((MENTION, str(self.mention).lower()))
         if self.sharealike:
-            item.set(SHARE, str(self.sharealike).lower())
+            attributes.append((SHARE, str(self.sharealike).lower()))
         if self.usageguide:
-            item.set(USAGEGUIDE, str(self.usageguide))
+            attributes.append((USAGEGUIDE, str(self.usageguide)))
         if self.template:
-            item.set(TEMPLATE, str(self.template))
+            attributes.append((TEMPLATE, str(self.template)))
+        return attributes
+
+    def to_xml(self):
+        root = ET.Element(LIBRML)
+        root.set(XVERSION, VERSION)
+        root.append(ET.Comment(XCOMMENT))
+        item = ET.SubElement(root, ITEM, dict(self.xml_attributes()))
+
         if len(self.actions) > 0:
             for action in self.actions:
                 item.append(action.to_xml())
 
         return ET.tostring(root, encoding='unicode', method='xml', xml_declaration=True)
 
+    def to_bytes(self):
+        from model.binary import encode
+
+        return encode(self)
+
+    @staticmethod
+    def from_bytes(data: bytes):
+        from model.binary import decode
+
+        return decode(data)
+
+    def fingerprint(self):
+        from model.fingerprint import fingerprint
+
+        return fingerprint(self)
+
     def from_json(self, json_obj):
         data = json.loads(json_obj)
         self.from_dict(data)
 
     @staticmethod
-    def from_jsonstr(librmljson: str):
+    def from_jsonstr(librmljson: str, lazy: bool = False):
         librmldict = json.loads(librmljson)
         id = librmldict[ID]
         librml = LibRML(itemid=id)
-        librml.from_dict(librmldict)
+        librml.from_dict(librmldict, lazy=lazy)
         return librml
 
-    def from_dict(self, data):
+    def from_dict(self, data, lazy: bool = False):
         if ID in data:
             self.id = data[ID]
         else:
@@ -485,44 +630,78 @@ class LibRML(object):
             self.template = data[TEMPLATE]
         if ACTIONS in data:
             actions = data[ACTIONS]
-            for action in actions:
-                a = Action(ActionType.fname(action[TYPE]))
-                self.actions.append(a)
-                a.from_dict(action)
-
-    def from_xml(self, xml):
+            if lazy and self._can_defer():
+                _check_actions(actions)
+                entries = [(ActionType.fname(action[TYPE]), action) for action in actions]
+                self.defer_actions(DeferredActions(entries, _action_from_dict))
+            else:
+                for action in actions:
+                    a = Action(ActionType.fname(action[TYPE]))
+                    self.actions.append(a)
+                    a.from_dict(action)
+        self._plan = None
+        self.templatevars = None
+
+    def from_xml(self, xml, lazy: bool = False):
         xml_tree = ET.ElementTree(ET.fromstring(xml))
         root = xml_tree.getroot()
         if root.tag == LIBRML:
-            ie = root.find(ITEM)
-            if ie is not None and ID in ie.attrib and TENANT in ie.attrib:
-                self.id = ie.attrib.get(ID)
-                self.tenant = ie.attrib.get(TENANT)
-                if MENTION in ie.attrib:
-                    self.mention = ie.attrib.get(MENTION) == 'true'
-                if SHARE in ie.attrib:
-                    self.sharealike = ie.attrib.get(SHARE) == 'true'
-                if USAGEGUIDE in ie.attrib:
-                    self.usageguide = ie.attrib.get(USAGEGUIDE)
-                if TEMPLATE in ie.attrib:
-                    self.template = ie.attrib.get(TEMPLATE)
-                for action_node in ie.iter(XACTION):
-                    if TYPE in action_node.attrib:
-                        action = Action(type=ActionType.fname(action_node.attrib.get(TYPE)))
-                        action.from_xml(action_node)
-                        self.actions.append(action)
-                    else:
-                        raise LibRMLNotValidError('Action inside Item has no attribute "{}".'.format(TYPE))
-            else:
-                raise LibRMLNotValidError(
-                    'Can\'t find element "{}", or the {} has no "{}", or the {} has no "{}".'
-                        .format(ITEM, ITEM, ID, ITEM, TENANT))
+            self.from_xml_item(root.find(ITEM), lazy=lazy)
         else:
             raise LibRMLNotValidError('There is no root element named "{}". Go away!'.format(LIBRML))
 
+    def from_xml_item(self, ie, lazy: bool = False):
+        if ie is not None and ID in ie.attrib and TENANT in ie.attrib:
+            self.id = ie.attrib.get(ID)
+            self.tenant = ie.attrib.get(TENANT)
+            if MENTION in ie.attrib:
+                self.mention = ie.attrib.get(MENTION) == 'true'
+            if SHARE in ie.attrib:
+                self.sharealike = ie.attrib.get(SHARE) == 'true'
+            if USAGEGUIDE in ie.attrib:
+                self.usageguide = ie.attrib.get(USAGEGUIDE)
+            if TEMPLATE in ie.attrib:
+                self.template = ie.attrib.get(TEMPLATE)
+            lazy = lazy and self._can_defer()
+            entries = []
+            for action_node in ie.iter(XACTION):
+                if TYPE in action_node.attrib:
+                    action_type = ActionType.fname(action_node.attrib.get(TYPE))
+                    if lazy:
+                        entries.append((action_type, action_node))
+                    else:
+                        self.actions.append(_action_from_xml(action_type, action_node))
+                else:
+                    raise LibRMLNotValidError('Action inside Item has no attribute "{}".'.format(TYPE))
+            if entries:
+                self.defer_actions(DeferredActions(entries, _action_from_xml))
+            self._plan = None
+            self.templatevars = None
+        else:
+            raise LibRMLNotValidError(
+                'Can\'t find element "{}", or the {} has no "{}", or the {} has no "{}".'
+                    .format(ITEM, ITEM, ID, ITEM, TENANT))
+
     def allactionnames(self):
         return ActionType.getnames()
 
+    def compile(self):
+        from model.decision import DecisionPlan
+
+        self._plan = DecisionPlan(self.actions)
+        return self._plan
+
+    def plan(self):
+        plan = self._plan
+        if plan is None:
+            plan = self.compile()
+        return plan
+
+    def is_allowed(self, action, context):
+        if not isinstance(action, ActionType):
+            action = ActionType.fname(action)
+        return self.plan().is_allowed(action, context)
+
 
 if __name__ == '__main__':
     pass
@@ -13,6 +13,8 @@ MENTION = 'mention'
 SHARE = 'sharealike'
 USAGEGUIDE = 'usageguide'
 TEMPLATE = 'template'
+TEMPLATEVARS = 'templatevars'
+TEMPLATEHASH = 'templatehash'
 
 #XML
 XRESTRICTION = 'restriction'
@@ -21,6 +23,8 @@ XPART = 'part'
 XGROUP = 'group'
 XSUBNET = 'subnet'
 XMACHINE = 'machine'
+XVERSION = 'version'
+XCOMMENT = ' This XML is created using the libRML Python code '
 
 # Fieldnames
 SUBNET = 'subnet'
@@ -0,0 +1,68 @@
+import io
+import json
+import logging
+
+from common.errors import ZHSerError
+from model.librml import LibRML
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 16
+
+
+def _log_error(lineno, line, error):
+    logger.error('Can not read LibRML from line {}: {}'.format(lineno, error))
+
+
+def _parse_line(lineno, line, on_error, lazy):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if isinstance(line, bytes):
+            # decoded per line, so one broken byte sequence only costs its own line
+            line = line.decode('utf-8')
+        librml = LibRML(itemid=None)
+        librml.from_dict(json.loads(line), lazy=lazy)
+        return librml
+    except (ValueError, TypeError, KeyError, AttributeError, ZHSerError) as error:
+        on_error(lineno, line, error)
+        return None
+
+
+def iter_ndjson(fileobj, chunk_size: int = CHUNK_SIZE, on_error=None, lazy: bool = False):
+    if on_error is None:
+        on_error = _log_error
+    buffer = None
+    newline = None
+    lineno = 0
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        if buffer is None:
+            buffer = chunk[:0]
+            newline = b'\n' if isinstance(chunk, bytes) else '\n'
+        buffer += chunk
+        lines = buffer.split(newline)
+        buffer = lines.pop()
+        for line in lines:
+            lineno += 1
+            librml = _parse_line(lineno, line, on_error, lazy)
+            if librml is not None:
+                yield librml
+    if buffer:
+        lineno += 1
+        librml = _parse_line(lineno, buffer, on_error, lazy)
+        if librml is not None:
+            yield librml
+
+
+def write_ndjson(records, fileobj):
+    binary = isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase))
+    count = 0
+    for librml in records:
+        line = json.dumps(librml.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n'
+        fileobj.write(line.encode('utf-8') if binary else line)
+        count += 1
+    return count
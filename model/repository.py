@@ -0,0 +1,178 @@
+import collections
+import datetime
+import functools
+import itertools
+import logging
+import sqlite3
+
+from model.binary import decode, encode
+from model.librml import LibRML, ActionType, RestrictionType
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10000
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, tenant TEXT, mention INTEGER NOT NULL, '
+    'sharealike INTEGER NOT NULL, usageguide TEXT, template TEXT, body BLOB NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS actions (id TEXT NOT NULL, action INTEGER NOT NULL, permission INTEGER)',
+    'CREATE TABLE IF NOT EXISTS restrictions (id TEXT NOT NULL, action INTEGER NOT NULL, type INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS groups (id TEXT NOT NULL, action INTEGER NOT NULL, name TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS dates (id TEXT NOT NULL, action INTEGER NOT NULL, fromdate TEXT, todate TEXT)',
+    'CREATE INDEX IF NOT EXISTS records_template ON records (template)',
+    'CREATE INDEX IF NOT EXISTS records_tenant ON records (tenant)',
+    'CREATE INDEX IF NOT EXISTS actions_id ON actions (id)',
+    'CREATE INDEX IF NOT EXISTS actions_action ON actions (action, permission)',
+    'CREATE INDEX IF NOT EXISTS restrictions_id ON restrictions (id)',
+    'CREATE INDEX IF NOT EXISTS restrictions_type ON restrictions (action, type)',
+    'CREATE INDEX IF NOT EXISTS groups_id ON groups (id)',
+    'CREATE INDEX IF NOT EXISTS groups_name ON groups (name, action)',
+    'CREATE INDEX IF NOT EXISTS dates_id ON dates (id)',
+    'CREATE INDEX IF NOT EXISTS dates_fromdate ON dates (action, fromdate)',
+    'CREATE INDEX IF NOT EXISTS dates_todate ON dates (action, todate)',
+)
+SIDE_TABLES = ('actions', 'restrictions', 'groups', 'dates')
+RECORD_COLUMNS = 'id, tenant, mention, sharealike, usageguide, template, body'
+
+
+def _action_type(action):
+    if not isinstance(action, ActionType):
+        action = ActionType.fname(action)
+    return action
+
+
+def _isodate(value):
+    return value.isoformat() if value else None
+
+
+def _decode_actions(body):
+    return decode(body).actions
+
+
+def _row_to_librml(row):
+    itemid, tenant, mention, sharealike, usageguide, template, body = row
+    librml = LibRML(itemid=itemid, tenant=tenant, mention=bool(mention), sharealike=bool(sharealike),
+                    usageguide=usageguide, template=template)
+    librml.defer_actions(functools.partial(_decode_actions, body))
+    return librml
+
+
+class LibRMLRepository(object):
+    def __init__(self, filename: str = ':memory:'):
+        self.db = sqlite3.connect(str(filename))
+        if filename != ':memory:':
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+        with self.db:
+            for statement in SCHEMA:
+                self.db.execute(statement)
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def __contains__(self, itemid):
+        return self.db.execute('SELECT 1 FROM records WHERE id = ?', (itemid,)).fetchone() is not None
+
+    def close(self):
+        self.db.close()
+
+    def upsert(self, librml):
+        return self.upsert_many((librml,))
+
+    def upsert_many(self, records, batch_size: int = BATCH_SIZE):
+        records = iter(records)
+        count = 0
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                return count
+            # a feed may update the same item twice in one batch, only its last version is stored
+            latest = collections.OrderedDict()
+            for librml in batch:
+                latest.pop(librml.id, None)
+                latest[librml.id] = librml
+            rows = []
+            actions = []
+            restrictions = []
+            groups = []
+            dates = []
+            for librml in latest.values():
+                rows.append((librml.id, librml.tenant, int(bool(librml.mention)), int(bool(librml.sharealike)),
+                             librml.usageguide, librml.template, encode(librml)))
+                for action in librml.actions:
+                    atype = action.type.value
+                    actions.append((librml.id, atype, None if action.permission is None else int(action.permission)))
+                    for restriction in action.restrictions:
+                        restrictions.append((librml.id, atype, restriction.type.value))
+                        if restriction.type == RestrictionType.GROUP:
+                            groups.extend((librml.id, atype, group) for group in restriction.groups)
+                        elif restriction.type == RestrictionType.DATE:
+                            dates.append((librml.id, atype, _isodate(restriction.fromdate),
+                                          _isodate(restriction.todate)))
+            ids = [(row[0],) for row in rows]
+            with self.db:
+                for table in SIDE_TABLES:
+                    self.db.executemany('DELETE FROM {} WHERE id = ?'.format(table), ids)
+                self.db.executemany('INSERT INTO records ({}) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                                    'ON CONFLICT(id) DO UPDATE SET tenant = excluded.tenant, '
+                                    'mention = excluded.mention, sharealike = excluded.sharealike, '
+                                    'usageguide = excluded.usageguide, template = excluded.template, '
+                                    'body = excluded.body'.format(RECORD_COLUMNS), rows)
+                self.db.executemany('INSERT INTO actions (id, action, permission) VALUES (?, ?, ?)', actions)
+                self.db.executemany('INSERT INTO restrictions (id, action, type) VALUES (?, ?, ?)', restrictions)
+                self.db.executemany('INSERT INTO groups (id, action, name) VALUES (?, ?, ?)', groups)
+                self.db.executemany('INSERT INTO dates (id, action, fromdate, todate) VALUES (?, ?, ?, ?)', dates)
+            count += len(batch)
+
+    def delete(self, itemid):
+        with self.db:
+            for table in SIDE_TABLES:
+                self.db.execute('DELETE FROM {} WHERE id = ?'.format(table), (itemid,))
+            return self.db.execute('DELETE FROM records WHERE id = ?', (itemid,)).rowcount > 0
+
+    def get(self, itemid):
+        row = self.db.execute('SELECT {} FROM records WHERE id = ?'.format(RECORD_COLUMNS), (itemid,)).fetchone()
+        return _row_to_librml(row) if row is not None else None
+
+    def _select(self, where, params):
+        cursor = self.db.execute('SELECT {} FROM records WHERE {} ORDER BY id'.format(RECORD_COLUMNS, where), params)
+        for row in cursor:
+            yield _row_to_librml(row)
+
+    def ids(self):
+        return [row[0] for row in self.db.execute('SELECT id FROM records ORDER BY id')]
+
+    def all(self):
+        return self._select('1', ())
+
+    def by_template(self, template):
+        return self._select('template = ?', (template,))
+
+    def by_tenant(self, tenant):
+        return self._select('tenant = ?', (tenant,))
+
+    def with_action(self, action, permission: bool = True):
+        return self._select('id IN (SELECT id FROM actions WHERE action = ? AND permission IS ?)',
+                            (_action_type(action).value, None if permission is None else int(permission)))
+
+    def with_group(self, group, action=None):
+        if action is None:
+            return self._select('id IN (SELECT id FROM groups WHERE name = ?)', (group,))
+        return self._select('id IN (SELECT id FROM groups WHERE name = ? AND action = ?)',
+                            (group, _action_type(action).value))
+
+    def with_restriction(self, restriction_type, action=None):
+        if not isinstance(restriction_type, RestrictionType):
+            restriction_type = RestrictionType.fname(restriction_type)
+        if action is None:
+            return self._select('id IN (SELECT id FROM restrictions WHERE type = ?)', (restriction_type.value,))
+        return self._select('id IN (SELECT id FROM restrictions WHERE action = ? AND type = ?)',
+                            (_action_type(action).value, restriction_type.value))
+
+    def embargo_ends_before(self, day: datetime.date, action=ActionType.READ):
+        return self._select('id IN (SELECT id FROM dates WHERE action = ? AND fromdate < ?)',
+                            (_action_type(action).value, day.isoformat()))
+
+    def access_ends_before(self, day: datetime.date, action=ActionType.READ):
+        return self._select('id IN (SELECT id FROM dates WHERE action = ? AND todate < ?)',
+                            (_action_type(action).value, day.isoformat()))
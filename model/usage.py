@@ -0,0 +1,304 @@
+import abc
+import asyncio
+import functools
+import logging
+import sqlite3
+import threading
+import time
+
+from model.librml import ActionType, ACTION_NAMES
+
+logger = logging.getLogger(__name__)
+
+STRIPES = 64
+DEFAULT_TTL = 300.0
+FLUSH_INTERVAL = 0.5
+FLUSH_BATCH = 1000
+
+
+class UsageStore(abc.ABC):
+    blocking = False
+
+    @abc.abstractmethod
+    def check_and_increment(self, key, limit: int, amount: int = 1):
+        pass
+
+    @abc.abstractmethod
+    def count(self, key):
+        pass
+
+    @abc.abstractmethod
+    def reset(self, key):
+        pass
+
+    @abc.abstractmethod
+    def acquire(self, key, session, limit: int, ttl: float = DEFAULT_TTL):
+        pass
+
+    @abc.abstractmethod
+    def release(self, key, session):
+        pass
+
+    @abc.abstractmethod
+    def sessions(self, key):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryUsageStore(UsageStore):
+    def __init__(self, stripes: int = STRIPES, clock=time.monotonic):
+        # one lock per stripe of keys, so unrelated items never wait for each other
+        self.locks = [threading.Lock() for _ in range(stripes)]
+        self.clock = clock
+        self.counters = {}
+        self.leases = {}
+
+    def _lock(self, key):
+        return self.locks[hash(key) % len(self.locks)]
+
+    def _purge(self, key, now):
+        leases = self.leases.get(key)
+        if leases is None:
+            return None
+        for session in [session for session, expires in leases.items() if expires <= now]:
+            del leases[session]
+        if not leases:
+            del self.leases[key]
+            return None
+        return leases
+
+    def check_and_increment(self, key, limit: int, amount: int = 1):
+        with self._lock(key):
+            value = self.counters.get(key, 0) + amount
+            if value > limit:
+                return False
+            self.counters[key] = value
+            return True
+
+    def count(self, key):
+        return self.counters.get(key, 0)
+
+    def reset(self, key):
+        with self._lock(key):
+            self.counters.pop(key, None)
+
+    def acquire(self, key, session, limit: int, ttl: float = DEFAULT_TTL):
+        with self._lock(key):
+            now = self.clock()
+            leases = self._purge(key, now)
+            if leases is None:
+                if limit < 1:
+                    return False
+                leases = self.leases[key] = {}
+            elif session not in leases and len(leases) >= limit:
+                return False
+            leases[session] = now + ttl
+            return True
+
+    def release(self, key, session):
+        with self._lock(key):
+            leases = self.leases.get(key)
+            if leases is None or leases.pop(session, None) is None:
+                return False
+            if not leases:
+                del self.leases[key]
+            return True
+
+    def sessions(self, key):
+        with self._lock(key):
+            leases = self._purge(key, self.clock())
+            return len(leases) if leases is not None else 0
+
+    def _lease_snapshot(self, key):
+        with self._lock(key):
+            return dict(self.leases.get(key, {}))
+
+
+class SQLiteUsageStore(MemoryUsageStore):
+    def __init__(self, filename, stripes: int = STRIPES, flush_interval: float = FLUSH_INTERVAL,
+                 flush_batch: int = FLUSH_BATCH):
+        # leases are persisted, so they expire on the wall clock
+        super().__init__(stripes=stripes, clock=time.time)
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.db = sqlite3.connect(str(filename), check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS leases (key TEXT NOT NULL, session TEXT NOT NULL, '
+                        'expires REAL NOT NULL, PRIMARY KEY (key, session))')
+        self.db.commit()
+        for key, value in self.db.execute('SELECT key, value FROM counters'):
+            self.counters[key] = value
+        now = self.clock()
+        for key, session, expires in self.db.execute('SELECT key, session, expires FROM leases'):
+            if expires > now:
+                self.leases.setdefault(key, {})[session] = expires
+        self.dirty_counters = set()
+        self.dirty_leases = set()
+        self.dirty_lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.flusher = threading.Thread(target=self._run, name='usage-flusher', daemon=True)
+        self.flusher.start()
+
+    def _mark(self, dirty, key):
+        with self.dirty_lock:
+            dirty.add(key)
+            pending = len(self.dirty_counters) + len(self.dirty_leases)
+        if pending >= self.flush_batch:
+            self.wakeup.set()
+
+    def check_and_increment(self, key, limit: int, amount: int = 1):
+        if not super().check_and_increment(key, limit, amount):
+            return False
+        self._mark(self.dirty_counters, key)
+        return True
+
+    def reset(self, key):
+        super().reset(key)
+        self._mark(self.dirty_counters, key)
+
+    def acquire(self, key, session, limit: int, ttl: float = DEFAULT_TTL):
+        if not super().acquire(key, session, limit, ttl):
+            return False
+        self._mark(self.dirty_leases, key)
+        return True
+
+    def release(self, key, session):
+        if not super().release(key, session):
+            return False
+        self._mark(self.dirty_leases, key)
+        return True
+
+    def _run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as error:
+                logger.error('Can not write usage state: {}'.format(error))
+
+    def flush(self):
+        with self.dirty_lock:
+            counters, self.dirty_counters = self.dirty_counters, set()
+            leases, self.dirty_leases = self.dirty_leases, set()
+        if not counters and not leases:
+            return 0
+        upserts = []
+        deletes = []
+        for key in counters:
+            value = self.counters.get(key)
+            if value is None:
+                deletes.append((key,))
+            else:
+                upserts.append((key, value))
+        rows = []
+        for key in leases:
+            rows.extend((key, session, expires) for session, expires in self._lease_snapshot(key).items())
+        with self.db_lock:
+            with self.db:
+                self.db.executemany('INSERT INTO counters (key, value) VALUES (?, ?) '
+                                    'ON CONFLICT(key) DO UPDATE SET value = excluded.value', upserts)
+                self.db.executemany('DELETE FROM counters WHERE key = ?', deletes)
+                self.db.executemany('DELETE FROM leases WHERE key = ?', [(key,) for key in leases])
+                self.db.executemany('INSERT INTO leases (key, session, expires) VALUES (?, ?, ?)', rows)
+        return len(counters) + len(leases)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.wakeup.set()
+        self.flusher.join()
+        self.flush()
+        with self.db_lock:
+            self.db.close()
+
+
+class AsyncUsageStore(object):
+    def __init__(self, store: UsageStore, executor=None):
+        self.store = store
+        self.executor = executor
+
+    async def _call(self, method, *args):
+        if not self.store.blocking:
+            # the in-memory stores only hold a stripe lock for a few dict operations
+            return method(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(method, *args))
+
+    async def check_and_increment(self, key, limit: int, amount: int = 1):
+        return await self._call(self.store.check_and_increment, key, limit, amount)
+
+    async def count(self, key):
+        return await self._call(self.store.count, key)
+
+    async def reset(self, key):
+        return await self._call(self.store.reset, key)
+
+    async def acquire(self, key, session, limit: int, ttl: float = DEFAULT_TTL):
+        return await self._call(self.store.acquire, key, session, limit, ttl)
+
+    async def release(self, key, session):
+        return await self._call(self.store.release, key, session)
+
+    async def sessions(self, key):
+        return await self._call(self.store.sessions, key)
+
+    async def consume(self, librml, action, context, subject=None, session=None, ttl: float = DEFAULT_TTL):
+        return await self._call(consume, librml, action, context, self.store, subject, session, ttl)
+
+    async def close(self):
+        # closing joins the flusher thread and writes the last batch, never do that on the loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.store.close)
+
+
+def usage_key(librml, action: ActionType, subject=None):
+    key = '{}/{}'.format(librml.id, ACTION_NAMES[action])
+    return key if subject is None else '{}/{}'.format(key, subject)
+
+
+def usage_limits(librml, action: ActionType, context):
+    return librml.plan().usage_limits(action, context)
+
+
+def _consume_one(store: UsageStore, key, count, sessions, session, ttl):
+    if count is not None and not store.check_and_increment(key, count):
+        return False
+    if sessions is not None and not store.acquire(key, session, sessions, ttl):
+        if count is not None:
+            # give the use back, the session limit denied it
+            store.check_and_increment(key, count, -1)
+        return False
+    return True
+
+
+def consume(librml, action, context, store: UsageStore, subject=None, session=None, ttl: float = DEFAULT_TTL):
+    if not isinstance(action, ActionType):
+        action = ActionType.fname(action)
+    limits = usage_limits(librml, action, context)
+    if not limits:
+        return False
+    if (None, None) in limits:
+        return True
+    if session is None:
+        if all(sessions is not None for count, sessions in limits):
+            raise ValueError('Action "{}" is limited to concurrent sessions, a session is required.'
+                             .format(ACTION_NAMES[action]))
+        limits = [(count, sessions) for count, sessions in limits if sessions is None]
+    # the use is denied only when none of the alternatives the context qualifies for has capacity left
+    key = usage_key(librml, action, subject)
+    for count, sessions in limits:
+        if _consume_one(store, key, count, sessions, session, ttl):
+            return True
+    return False
+
+
+def release(librml, action, store: UsageStore, session, subject=None):
+    if not isinstance(action, ActionType):
+        action = ActionType.fname(action)
+    return store.release(usage_key(librml, action, subject), session)
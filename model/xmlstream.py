@@ -0,0 +1,107 @@
+import logging
+import xml.etree.ElementTree as ET
+
+from common.errors import LibRMLNotValidError
+from model.librml import LibRML
+from model.names import LIBRML, ITEM, XACTION, XRESTRICTION, XVERSION, XCOMMENT, VERSION
+
+logger = logging.getLogger(__name__)
+
+XML_DECLARATION = ET.tostring(ET.Element(LIBRML), encoding='unicode', xml_declaration=True).partition('\n')[0]
+XML_HEAD = '{}\n<{} {}="{}"><!--{}-->'.format(XML_DECLARATION, LIBRML, XVERSION, VERSION, XCOMMENT)
+XML_TAIL = '</{}>'.format(LIBRML)
+
+
+def iter_xml(source, lazy: bool = False):
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                if elem.tag != LIBRML:
+                    raise LibRMLNotValidError('There is no root element named "{}". Go away!'.format(LIBRML))
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1 and elem.tag == ITEM:
+            librml = LibRML(itemid=None)
+            librml.from_xml_item(elem, lazy=lazy)
+            # drop the parsed item, so the tree never grows beyond one item
+            root.clear()
+            yield librml
+
+
+def _escape_text(text):
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _escape_attribute(text):
+    text = _escape_text(text)
+    if '"' in text:
+        text = text.replace('"', '&quot;')
+    if '\r' in text:
+        text = text.replace('\r', '&#13;')
+    if '\n' in text:
+        text = text.replace('\n', '&#10;')
+    if '\t' in text:
+        text = text.replace('\t', '&#09;')
+    return text
+
+
+def _start_tag(tag, attributes):
+    return '<' + tag + ''.join(' {}="{}"'.format(name, _escape_attribute(value)) for name, value in attributes)
+
+
+def _item_xml(librml, out):
+    out.append(_start_tag(ITEM, librml.xml_attributes()))
+    if len(librml.actions) == 0:
+        out.append(' />')
+        return
+    out.append('>')
+    for action in librml.actions:
+        out.append(_start_tag(XACTION, action.xml_attributes()))
+        if len(action.restrictions) == 0:
+            out.append(' />')
+            continue
+        out.append('>')
+        for restriction in action.restrictions:
+            attributes, children = restriction.xml_content()
+            out.append(_start_tag(XRESTRICTION, attributes))
+            if not children:
+                out.append(' />')
+                continue
+            out.append('>')
+            for tag, text in children:
+                if text:
+                    out.append('<{0}>{1}</{0}>'.format(tag, _escape_text(text)))
+                else:
+                    out.append('<{} />'.format(tag))
+            out.append('</{}>'.format(XRESTRICTION))
+        out.append('</{}>'.format(XACTION))
+    out.append('</{}>'.format(ITEM))
+
+
+def write_xml(librml, stream):
+    out = [XML_HEAD]
+    _item_xml(librml, out)
+    out.append(XML_TAIL)
+    stream.write(''.join(out))
+
+
+def write_xml_many(records, stream):
+    stream.write(XML_HEAD)
+    count = 0
+    for librml in records:
+        out = []
+        _item_xml(librml, out)
+        stream.write(''.join(out))
+        count += 1
+    stream.write(XML_TAIL)
+    return count
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 256
+MAX_DELAY = 0.002
+
+
+class MicroBatcher(object):
+    def __init__(self, evaluate, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY, metrics=None):
+        self.evaluate = evaluate
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.metrics = metrics
+        self.pending = []
+        self.handle = None
+        self.last = 0
+
+    def _enqueue(self, query):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((query, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif self.handle is None:
+            # only wait for a batch to fill while requests actually arrive together, a lone request
+            # is answered on the next turn of the loop
+            if self.last > 1:
+                self.handle = loop.call_later(self.max_delay, self.flush)
+            else:
+                self.handle = loop.call_soon(self.flush)
+        return future
+
+    async def submit(self, query):
+        return await self._enqueue(query)
+
+    async def submit_many(self, queries):
+        return await asyncio.gather(*[self._enqueue(query) for query in queries])
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        pending, self.pending = self.pending, []
+        self.last = len(pending)
+        if not pending:
+            return
+        try:
+            results = self.evaluate([query for query, future in pending])
+        except Exception as error:
+            logger.exception('Can not evaluate a batch of {} queries.'.format(len(pending)))
+            for query, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (query, future), result in zip(pending, results):
+            if future.done():
+                continue
+            # evaluate hands back the exception of a query that failed on its own
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        if self.metrics is not None:
+            self.metrics.batch(len(pending))
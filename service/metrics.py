@@ -0,0 +1,58 @@
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 10000
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Metrics(object):
+    def __init__(self, window: int = WINDOW):
+        self.started = time.monotonic()
+        self.latencies = collections.deque(maxlen=window)
+        self.batches = collections.deque(maxlen=window)
+        self.requests = collections.Counter()
+        self.decisions = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def request(self, endpoint, seconds):
+        with self.lock:
+            self.requests[endpoint] += 1
+            self.latencies.append(seconds)
+
+    def batch(self, size):
+        with self.lock:
+            self.batches.append(size)
+            self.decisions += size
+
+    def error(self):
+        with self.lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            latencies = list(self.latencies)
+            batches = list(self.batches)
+            requests = dict(self.requests)
+        p50 = percentile(latencies, 0.50)
+        p99 = percentile(latencies, 0.99)
+        return dict(uptime=time.monotonic() - self.started,
+                    requests=requests,
+                    decisions=self.decisions,
+                    errors=self.errors,
+                    latency_ms=dict(p50=p50 * 1000 if p50 is not None else None,
+                                    p99=p99 * 1000 if p99 is not None else None,
+                                    samples=len(latencies)),
+                    batch=dict(count=len(batches),
+                               mean=sum(batches) / len(batches) if batches else None,
+                               max=max(batches) if batches else None))
@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import time
+
+from common.errors import ZHSerError
+from model.decision import Context
+from model.decisioncache import DecisionCache
+from model.formats import read_records
+from model.librml import ActionType, ACTION_NAMES
+from service.batcher import MicroBatcher, MAX_BATCH, MAX_DELAY
+from service.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+MAX_BODY = 16 << 20
+
+ENDPOINTS = ('/allowed', '/allowed/bulk', '/metrics', '/health')
+OTHER = 'other'
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def context_key(data):
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise RequestError(400, 'Context must be an object.')
+    groups = data.get('groups') or ()
+    if isinstance(groups, str) or not all(isinstance(group, str) for group in groups):
+        raise RequestError(400, 'Context groups must be a list of strings.')
+    age = data.get('age')
+    if age is not None and not isinstance(age, int):
+        raise RequestError(400, 'Context age must be an integer.')
+    return (frozenset(groups), age, data.get('ip'), data.get('date'), bool(data.get('commercial', False)),
+            data.get('machine'))
+
+
+def make_context(key):
+    groups, age, ip, day, commercial, machine = key
+    return Context(groups=groups, age=age, ip=ip, date=datetime.date.fromisoformat(day) if day else None,
+                   commercial=commercial, machine=machine)
+
+
+class DecisionService(object):
+    def __init__(self, records=(), cache: DecisionCache = None, max_batch: int = MAX_BATCH,
+                 max_delay: float = MAX_DELAY):
+        self.records = {}
+        self.cache = cache
+        self.metrics = Metrics()
+        self.batcher = MicroBatcher(self.evaluate, max_batch=max_batch, max_delay=max_delay, metrics=self.metrics)
+        self.load(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def load(self, records):
+        count = 0
+        for librml in records:
+            self.records[librml.id] = librml
+            count += 1
+        return count
+
+    def evaluate(self, queries):
+        contexts = {}
+        results = []
+        for itemid, action, key in queries:
+            librml = self.records.get(itemid)
+            if librml is None:
+                results.append(None)
+                continue
+            # queries in one batch with the same context share the parsed Context
+            try:
+                context = contexts.get(key)
+                if context is None:
+                    context = contexts[key] = make_context(key)
+                if self.cache is not None:
+                    results.append(self.cache.is_allowed(librml, action, context))
+                else:
+                    results.append(librml.is_allowed(action, context))
+            except Exception as error:
+                # fail only this query, the rest of the batch is still answered
+                logger.exception('Can not evaluate "{}" for "{}".'.format(ACTION_NAMES[action], itemid))
+                results.append(error)
+        return results
+
+    async def allowed(self, itemid, action: ActionType, key):
+        return await self.batcher.submit((itemid, action, key))
+
+    async def allowed_many(self, itemids, action: ActionType, key):
+        results = await self.batcher.submit_many([(itemid, action, key) for itemid in itemids])
+        return dict(zip(itemids, results))
+
+
+def _parse_query(body):
+    try:
+        data = json.loads(body)
+    except ValueError as error:
+        raise RequestError(400, 'Invalid JSON: {}'.format(error))
+    if not isinstance(data, dict):
+        raise RequestError(400, 'Request must be a JSON object.')
+    try:
+        action = ActionType.fname(data.get('action') or '')
+    except ValueError as error:
+        raise RequestError(400, str(error))
+    key = context_key(data.get('context'))
+    try:
+        make_context(key)
+    except ValueError as error:
+        raise RequestError(400, 'Invalid context: {}'.format(error))
+    return data, action, key
+
+
+class DecisionServer(object):
+    def __init__(self, service: DecisionService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info('Decision service with {} records listening on {}:{}'.format(
+            len(self.service), self.host, self.port))
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def dispatch(self, method, path, body):
+        if path == '/allowed':
+            if method != 'POST':
+                raise RequestError(405, 'Use POST.')
+            data, action, key = _parse_query(body)
+            itemid = data.get('id')
+            if not isinstance(itemid, str):
+                raise RequestError(400, 'Request needs a string "id".')
+            allowed = await self.service.allowed(itemid, action, key)
+            if allowed is None:
+                raise RequestError(404, 'No record with id "{}".'.format(itemid))
+            return 200, dict(id=itemid, action=data['action'], allowed=allowed)
+        elif path == '/allowed/bulk':
+            if method != 'POST':
+                raise RequestError(405, 'Use POST.')
+            data, action, key = _parse_query(body)
+            itemids = data.get('ids')
+            if not isinstance(itemids, list) or not all(isinstance(itemid, str) for itemid in itemids):
+                raise RequestError(400, 'Bulk request needs a list of string "ids".')
+            return 200, dict(action=data['action'], results=await self.service.allowed_many(itemids, action, key))
+        elif path == '/metrics':
+            return 200, self.service.metrics.snapshot()
+        elif path == '/health':
+            return 200, dict(status='ok', records=len(self.service))
+        raise RequestError(404, 'Unknown path "{}".'.format(path))
+
+    async def _read_head(self, reader):
+        # StreamReader refuses lines above its limit with a ValueError, such a request gets a 400
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            try:
+                method, target, version = line.decode('latin-1').split()
+            except ValueError:
+                return None
+            headers = {}
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = header.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            raise RequestError(400, 'Request line or header is too long.')
+        return method, target, version, headers
+
+    async def _respond(self, writer, status, payload, keepalive):
+        data = json.dumps(payload, default=str).encode('utf-8')
+        writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n'
+                     'Connection: {}\r\n\r\n'.format(status, REASONS.get(status, ''), len(data),
+                                                     'keep-alive' if keepalive else 'close')
+                     .encode('latin-1') + data)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    head = await self._read_head(reader)
+                except RequestError as error:
+                    self.service.metrics.error()
+                    await self._respond(writer, error.status, dict(error=str(error)), False)
+                    self.service.metrics.request(OTHER, time.perf_counter() - started)
+                    break
+                if head is None:
+                    break
+                started = time.perf_counter()
+                method, target, version, headers = head
+                path = target.partition('?')[0]
+                keepalive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY:
+                        raise RequestError(413, 'Request body is too large.')
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.dispatch(method, path, body)
+                except RequestError as error:
+                    status, payload = error.status, dict(error=str(error))
+                    self.service.metrics.error()
+                except (ValueError, ZHSerError) as error:
+                    status, payload = 400, dict(error=str(error))
+                    self.service.metrics.error()
+                except Exception as error:
+                    logger.exception('Request {} {} failed.'.format(method, path))
+                    status, payload = 500, dict(error=str(error))
+                    self.service.metrics.error()
+                await self._respond(writer, status, payload, keepalive)
+                # clients choose the path, only known endpoints get a counter of their own
+                self.service.metrics.request(path if path in ENDPOINTS else OTHER, time.perf_counter() - started)
+                if not keepalive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Answer LibRML access decisions over HTTP.')
+    parser.add_argument('files', nargs='+', help='LibRML records as .xml, .ndjson or .lrmlb files')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--max-delay', type=float, default=MAX_DELAY, help='seconds to wait for a batch to fill')
+    parser.add_argument('--cache-size', type=int, default=0, help='entries in the decision cache, 0 disables it')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    cache = DecisionCache(maxsize=args.cache_size) if args.cache_size > 0 else None
+    service = DecisionService(cache=cache, max_batch=args.max_batch, max_delay=args.max_delay)
+    for filename in args.files:
+        logger.info('Loaded {} records from {}'.format(service.load(read_records(filename)), filename))
+    for librml in service.records.values():
+        librml.compile()
+    server = DecisionServer(service, host=args.host, port=args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
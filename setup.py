@@ -12,7 +12,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/slub/pylibrml",
-    packages=setuptools.find_packages(include=['common', 'model', 'tmpl']),
+    packages=setuptools.find_packages(include=['common', 'model', 'tmpl', 'service', 'cli']),
     classifiers=[
         "Development Status :: 1 - Planning",
         "Environment :: Console",
@@ -25,4 +25,6 @@ setuptools.setup(
     ],
     python_requires='~=3.8',
     install_requires=['jinja2'],
+    extras_require={'batch': ['numpy']},
+    entry_points={'console_scripts': ['pylibrml=cli.main:main']},
 )
@@ -0,0 +1,18 @@
+import pathlib
+import sys
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+TEMPLATE_PATH = ROOT / 'sample-templates'
+
+sys.path.insert(0, str(ROOT))
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    # the deployment provides its own config module, the tests only need the shipped templates
+    class Config(object):
+        TEMPLATE_PATH = TEMPLATE_PATH
+        TEMPLATE_CHECK_INTERVAL = 0
+
+    sys.modules['config'] = types.SimpleNamespace(Config=Config)
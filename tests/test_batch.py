@@ -0,0 +1,48 @@
+import datetime
+
+import pytest
+
+from model.decision import Context
+from model.groups import default_groups
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+np = pytest.importorskip('numpy')
+
+from model.batch import MASK_BITS, RightsTable  # noqa: E402
+
+
+def _record(itemid, groups):
+    restriction = Restriction(RestrictionType.GROUP)
+    restriction.groups = list(groups)
+    action = Action(ActionType.READ, permission=True)
+    action.restrictions.append(restriction)
+    return LibRML(itemid=itemid, tenant='t', actions=[action])
+
+
+def _contexts(groups):
+    yield Context()
+    yield Context(groups=['unknown'])
+    for group in groups:
+        yield Context(groups=[group], date=datetime.date(2030, 1, 1))
+
+
+def test_narrow_with_many_global_groups():
+    for i in range(MASK_BITS * 2):
+        default_groups.id('test-batch-{}'.format(i))
+    groups = ['test-batch-{}'.format(i) for i in range(MASK_BITS * 2 - 4, MASK_BITS * 2)]
+    records = [_record(str(i), groups[i % 4:i % 4 + 2]) for i in range(8)]
+    table = RightsTable(records)
+    assert table.narrow
+    for context in _contexts(groups):
+        assert list(table.evaluate(ActionType.READ, context)) == \
+            [record.is_allowed(ActionType.READ, context) for record in records]
+
+
+def test_wide_table_falls_back_to_entries():
+    groups = ['test-wide-{}'.format(i) for i in range(MASK_BITS + 8)]
+    records = [_record(str(i), groups[i:i + 3]) for i in range(len(groups))]
+    table = RightsTable(records)
+    assert not table.narrow
+    for context in _contexts(groups):
+        assert list(table.evaluate(ActionType.READ, context)) == \
+            [record.is_allowed(ActionType.READ, context) for record in records]
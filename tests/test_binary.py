@@ -0,0 +1,69 @@
+import io
+from datetime import date
+
+import pytest
+
+from common.errors import LibRMLNotValidError
+from model.binary import encode, decode, write_frames, iter_frames, FRAME_MAGIC, _write_varint
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+
+def _record(itemid='item'):
+    librml = LibRML(itemid=itemid, tenant='tenant', template='CCBY')
+    librml.actions.append(Action(type=ActionType.READ, permission=True, restrictions=[
+        Restriction(res_type=RestrictionType.DATE, fromdate=date(2030, 1, 1)),
+        Restriction(res_type=RestrictionType.GROUP, groups=['staff'])]))
+    return librml
+
+
+def test_roundtrip():
+    librml = _record()
+    assert decode(encode(librml)).to_dict() == librml.to_dict()
+
+
+def test_truncated_record():
+    data = encode(_record())
+    for end in range(len(data)):
+        with pytest.raises(LibRMLNotValidError):
+            decode(data[:end])
+
+
+def test_corrupted_bytes_raise_decode_error():
+    data = encode(_record())
+    for i in range(len(data)):
+        for value in (0x00, 0x7f, 0x80, 0xff):
+            corrupt = bytearray(data)
+            corrupt[i] = value
+            try:
+                decode(bytes(corrupt))
+            except LibRMLNotValidError:
+                pass
+
+
+def test_date_out_of_range():
+    data = bytearray(encode(_record()))
+    # replace the zigzag encoded day count of the fromdate with a huge varint
+    days = bytearray()
+    _write_varint(days, (date(2030, 1, 1).toordinal() - date(1970, 1, 1).toordinal()) << 1)
+    start = data.index(days)
+    huge = bytearray()
+    _write_varint(huge, 1 << 60)
+    data[start:start + len(days)] = huge
+    with pytest.raises(LibRMLNotValidError):
+        decode(bytes(data))
+
+
+def test_corrupted_frame():
+    stream = io.BytesIO()
+    write_frames([_record('a'), _record('b')], stream)
+    data = bytearray(stream.getvalue())
+    data[len(FRAME_MAGIC) + 1] = 0xee
+    with pytest.raises(LibRMLNotValidError):
+        list(iter_frames(io.BytesIO(bytes(data))))
+
+
+def test_truncated_frame():
+    stream = io.BytesIO()
+    write_frames([_record('a'), _record('b')], stream)
+    with pytest.raises(LibRMLNotValidError):
+        list(iter_frames(io.BytesIO(stream.getvalue()[:-3])))
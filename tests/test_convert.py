@@ -0,0 +1,60 @@
+import concurrent.futures
+
+import pytest
+
+import cli.convert
+from cli.convert import convert
+from cli.main import main
+from model.formats import XML, NDJSON, BINARY, read_records, write_records
+from model.librml import LibRML, Action, ActionType
+
+
+def _write(filename, fmt, itemids):
+    records = [LibRML(itemid=itemid, tenant='t', actions=[Action(ActionType.READ, permission=True)])
+               for itemid in itemids]
+    with open(str(filename), 'w' if fmt == XML else 'wb') as fileobj:
+        write_records(records, fileobj, fmt)
+
+
+def test_same_stem_does_not_collide(tmp_path):
+    source = tmp_path / 'in'
+    source.mkdir()
+    _write(source / 'a.xml', XML, ['x'])
+    _write(source / 'a.ndjson', NDJSON, ['n1', 'n2'])
+    report = convert([str(source)], str(tmp_path / 'out'), BINARY, workers=1)
+    assert report['failed'] == 0
+    outputs = [output for summary in report['files'] for output in summary['outputs']]
+    assert len(set(outputs)) == 2
+    assert sorted(record.id for output in outputs for record in read_records(output)) == ['n1', 'n2', 'x']
+
+
+def test_same_relative_path_is_refused(tmp_path):
+    for name in ('one', 'two'):
+        (tmp_path / name).mkdir()
+        _write(tmp_path / name / 'a.ndjson', NDJSON, [name])
+    with pytest.raises(ValueError):
+        convert([str(tmp_path / 'one'), str(tmp_path / 'two')], str(tmp_path / 'out'), BINARY)
+    assert main(['convert', '-q', '-t', BINARY, '-o', str(tmp_path / 'out'),
+                 str(tmp_path / 'one'), str(tmp_path / 'two')]) == 2
+
+
+def test_crashing_file_fails_alone(tmp_path, monkeypatch):
+    for name in ('good', 'bad'):
+        _write(tmp_path / '{}.ndjson'.format(name), NDJSON, [name])
+    convert_file = cli.convert.convert_file
+
+    def crashing(source, *args):
+        if source.stem == 'bad':
+            raise OverflowError('corrupt input')
+        return convert_file(source, *args)
+
+    monkeypatch.setattr(cli.convert, 'convert_file', crashing)
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', concurrent.futures.ThreadPoolExecutor)
+    for workers in (1, 2):
+        report = convert([str(tmp_path / 'good.ndjson'), str(tmp_path / 'bad.ndjson')],
+                         str(tmp_path / 'out'), BINARY, workers=workers)
+        assert [summary['failed'] for summary in report['files']] == [False, True]
+        assert report['failed'] == 1
+        assert report['records'] == 1
+    assert main(['convert', '-q', '-j', '2', '-t', BINARY, '-o', str(tmp_path / 'out'),
+                 str(tmp_path / 'good.ndjson'), str(tmp_path / 'bad.ndjson')]) == 1
@@ -0,0 +1,124 @@
+import datetime
+import ipaddress
+
+import pytest
+
+from model.decision import Context, DecisionPlan
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+DAY = datetime.date
+
+
+def _restriction(rtype, **values):
+    restriction = Restriction(rtype)
+    for name, value in values.items():
+        setattr(restriction, name, value)
+    return restriction
+
+
+def _record(*restrictions, permission=True, action=ActionType.READ):
+    a = Action(action, permission=permission)
+    for restriction in restrictions:
+        a.restrictions.append(restriction)
+    return LibRML(itemid='item', tenant='t', actions=[a])
+
+
+def _allowed(record, **context):
+    return record.is_allowed(ActionType.READ, Context(**context))
+
+
+def test_unrestricted_permission():
+    assert _allowed(_record())
+    assert not _allowed(_record(permission=False))
+    assert not _allowed(_record(permission=None))
+    assert not _record().is_allowed(ActionType.PRINT, Context())
+    assert _record().is_allowed('read', Context())
+
+
+def test_any_alternative_allows():
+    record = _record(_restriction(RestrictionType.AGE, minage='18'))
+    record.actions.append(Action(ActionType.READ, permission=True))
+    record.compile()
+    assert _allowed(record, age=10)
+    denied = _record(_restriction(RestrictionType.AGE, minage='18'))
+    denied.actions.append(Action(ActionType.READ, permission=False))
+    denied.compile()
+    assert not _allowed(denied, age=10)
+
+
+def test_date_bounds_are_inclusive():
+    record = _record(_restriction(RestrictionType.DATE, fromdate=DAY(2030, 1, 1), todate=DAY(2030, 12, 31)))
+    assert not _allowed(record, date=DAY(2029, 12, 31))
+    assert _allowed(record, date=DAY(2030, 1, 1))
+    assert _allowed(record, date=DAY(2030, 12, 31))
+    assert not _allowed(record, date=DAY(2031, 1, 1))
+    assert _allowed(_record(_restriction(RestrictionType.DATE)), date=DAY(1990, 1, 1))
+
+
+@pytest.mark.parametrize('commercialuse, noncommercialuse, commercial, noncommercial', [
+    (True, False, True, True),
+    (False, True, False, True),
+    (True, True, True, True),
+    (False, False, True, True),
+])
+def test_commercial_use(commercialuse, noncommercialuse, commercial, noncommercial):
+    record = _record(_restriction(RestrictionType.COMMERCIALUSE, commercialuse=commercialuse,
+                                  noncommercialuse=noncommercialuse))
+    assert _allowed(record, commercial=True) is commercial
+    assert _allowed(record, commercial=False) is noncommercial
+
+
+def test_age():
+    record = _record(_restriction(RestrictionType.AGE, minage='18'))
+    assert not _allowed(record)
+    assert not _allowed(record, age=17)
+    assert _allowed(record, age=18)
+    assert _allowed(_record(_restriction(RestrictionType.AGE)), age=None)
+
+
+def test_groups():
+    record = _record(_restriction(RestrictionType.GROUP, groups=['staff', 'students']))
+    assert _allowed(record, groups=['students'])
+    assert _allowed(record, groups=['guests', 'staff'])
+    assert not _allowed(record, groups=['guests'])
+    assert not _allowed(record)
+    assert _allowed(_record(_restriction(RestrictionType.GROUP, groups=[])))
+    both = _record(_restriction(RestrictionType.GROUP, groups=['staff']),
+                   _restriction(RestrictionType.GROUP, groups=['campus']))
+    assert not _allowed(both, groups=['staff'])
+    assert _allowed(both, groups=['staff', 'campus'])
+
+
+def test_location():
+    record = _record(_restriction(RestrictionType.LOCATION, subnet=['10.0.0.0/8', '2001:db8::/32'],
+                                  machines=['reading-room-1']))
+    assert _allowed(record, ip='10.20.30.40')
+    assert _allowed(record, ip=ipaddress.ip_address('2001:db8::1'))
+    assert not _allowed(record, ip='192.168.0.1')
+    assert _allowed(record, machine='reading-room-1')
+    assert _allowed(record, ip='192.168.0.1', machine='reading-room-1')
+    assert not _allowed(record, machine='laptop')
+    assert not _allowed(record)
+    assert _allowed(_record(_restriction(RestrictionType.LOCATION)))
+
+
+def test_obligations_do_not_deny():
+    record = _record(_restriction(RestrictionType.PARTS, parts='10'), _restriction(RestrictionType.COUNT, count=0),
+                     _restriction(RestrictionType.CONCURRENT, sessions=0))
+    assert _allowed(record)
+
+
+def test_context_defaults():
+    context = Context(ip='10.0.0.1')
+    assert context.ip == ipaddress.ip_address('10.0.0.1')
+    assert context.date == datetime.date.today()
+    assert context.groups == frozenset()
+    assert not context.commercial
+
+
+def test_plan_follows_from_dict():
+    record = _record()
+    assert not record.is_allowed(ActionType.PRINT, Context())
+    record.from_dict({'id': 'item', 'actions': [{'type': 'print', 'permission': True}]})
+    assert record.is_allowed(ActionType.PRINT, Context())
+    assert DecisionPlan(record.actions).is_allowed(ActionType.PRINT, Context())
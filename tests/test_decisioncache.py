@@ -0,0 +1,33 @@
+from model.decision import Context
+from model.decisioncache import DecisionCache
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+
+def _record():
+    restriction = Restriction(RestrictionType.GROUP)
+    restriction.groups = ['staff']
+    action = Action(ActionType.READ, permission=True)
+    action.restrictions.append(restriction)
+    return LibRML(itemid='item', tenant='t', actions=[action])
+
+
+def test_in_place_change_is_seen_after_compile():
+    record = _record()
+    cache = DecisionCache()
+    staff = Context(groups=['staff'])
+    guest = Context(groups=['guests'])
+    assert cache.is_allowed(record, ActionType.READ, staff)
+    assert not cache.is_allowed(record, ActionType.READ, guest)
+
+    record.actions[0].restrictions[0].groups = ['guests']
+    record.compile()
+    assert not cache.is_allowed(record, ActionType.READ, staff)
+    assert cache.is_allowed(record, ActionType.READ, guest)
+
+
+def test_unchanged_record_hits():
+    record = _record()
+    cache = DecisionCache()
+    for _ in range(3):
+        assert cache.is_allowed(record, ActionType.READ, Context(groups=['staff']))
+    assert cache.stats()['hits'] == 2
@@ -0,0 +1,73 @@
+import datetime
+
+from model.embargo import EmbargoIndex, START, END
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+DAY = datetime.date
+
+
+def _record(itemid, fromdate=None, todate=None, action=ActionType.READ):
+    restriction = Restriction(RestrictionType.DATE)
+    restriction.fromdate = fromdate
+    restriction.todate = todate
+    a = Action(action, permission=True)
+    a.restrictions.append(restriction)
+    return LibRML(itemid=itemid, tenant='t', actions=[a])
+
+
+def _index():
+    return EmbargoIndex([
+        _record('a', fromdate=DAY(2030, 1, 1)),
+        _record('b', fromdate=DAY(2030, 1, 1), todate=DAY(2030, 12, 31)),
+        _record('c', todate=DAY(2029, 6, 30), action=ActionType.PRINT),
+        _record('d'),
+    ])
+
+
+def test_range_queries():
+    index = _index()
+    assert len(index) == 3 and 'd' not in index
+    assert index.changes() == [
+        (DAY(2029, 7, 1), 'c', ActionType.PRINT, END),
+        (DAY(2030, 1, 1), 'a', ActionType.READ, START),
+        (DAY(2030, 1, 1), 'b', ActionType.READ, START),
+        (DAY(2031, 1, 1), 'b', ActionType.READ, END),
+    ]
+    assert index.opening(DAY(2030, 1, 1), DAY(2030, 1, 1)) == {'a', 'b'}
+    assert index.opening(DAY(2030, 1, 2), DAY(2040, 1, 1)) == set()
+    assert index.closing(DAY(2029, 1, 1), DAY(2031, 1, 1)) == {'b', 'c'}
+    assert index.closing(DAY(2029, 1, 1), DAY(2031, 1, 1), action='print') == {'c'}
+    assert index.changes(action=ActionType.MOVE) == []
+
+
+def test_next_change_and_boundary():
+    index = _index()
+    assert index.next_change('b', after=DAY(2029, 1, 1)) == DAY(2030, 1, 1)
+    assert index.next_change('b', after=DAY(2030, 1, 1)) == DAY(2031, 1, 1)
+    assert index.next_change('b', after=DAY(2031, 1, 1)) is None
+    assert index.next_change('b', after=DAY(2029, 1, 1), action=ActionType.PRINT) is None
+    assert index.next_change('missing') is None
+    assert index.next_boundary(after=DAY(2020, 1, 1)) == DAY(2029, 7, 1)
+    assert index.next_boundary(after=DAY(2020, 1, 1), action=ActionType.READ) == DAY(2030, 1, 1)
+
+
+def test_add_and_remove():
+    index = _index()
+    assert index.remove('a')
+    assert not index.remove('a')
+    assert index.opening(DAY(2030, 1, 1), DAY(2030, 1, 1)) == {'b'}
+    index.add(_record('b', fromdate=DAY(2032, 1, 1)))
+    assert index.opening(DAY(2030, 1, 1), DAY(2040, 1, 1)) == {'b'}
+    assert index.closing(DAY(2030, 1, 1), DAY(2040, 1, 1)) == set()
+    assert index.next_boundary(after=DAY(2029, 12, 31), action=ActionType.READ) == DAY(2032, 1, 1)
+    assert not index.add(_record('c'))
+    assert 'c' not in index
+    assert index.changes(action=ActionType.PRINT) == []
+
+
+def test_many_items_on_one_day():
+    records = [_record(str(i), fromdate=DAY(2030, 1, 1)) for i in range(1000)]
+    index = EmbargoIndex(records)
+    for record in records[::2]:
+        index.remove(record.id)
+    assert index.opening(DAY(2030, 1, 1), DAY(2030, 1, 1)) == {record.id for record in records[1::2]}
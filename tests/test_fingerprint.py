@@ -0,0 +1,48 @@
+import gc
+
+from model.fingerprint import ContentStore, fingerprint
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+
+def _record(itemid, group='staff'):
+    librml = LibRML(itemid=itemid, tenant='tenant')
+    librml.actions.append(Action(type=ActionType.READ, permission=True, restrictions=[
+        Restriction(res_type=RestrictionType.GROUP, groups=[group, 'guests'])]))
+    return librml
+
+
+def test_fingerprint_ignores_order_and_id():
+    first = _record('a')
+    second = _record('b')
+    second.actions[0].restrictions[0].groups.reverse()
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint(_record('a', group='alumni'))
+
+
+def test_store_shares_bodies():
+    store = ContentStore()
+    store.put(_record('a'))
+    store.put(_record('b'))
+    assert store.stats()['bodies'] == 1
+    assert store.get('a').actions.list is store.get('b').actions.list
+    assert store.get('b').to_dict() == _record('b').to_dict()
+
+
+def test_remove_releases_interned_bodies():
+    store = ContentStore()
+    for i in range(100):
+        store.put(_record(str(i), group='group{}'.format(i)))
+    assert store.stats()['bodies'] == 100
+    for i in range(100):
+        assert store.remove(str(i))
+    gc.collect()
+    assert store.stats() == dict(items=0, bodies=0, interned=0)
+
+
+def test_replacing_a_record_releases_its_old_body():
+    store = ContentStore()
+    store.put(_record('a', group='old'))
+    store.put(_record('a', group='new'))
+    gc.collect()
+    assert store.stats()['bodies'] == 1
+    assert len(store.pool.bodies) == 1
@@ -0,0 +1,51 @@
+import gc
+from datetime import date
+
+from model.intern import InternPool, SharedList, default_pool, intern
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+
+def _record(itemid, groups=('staff',)):
+    librml = LibRML(itemid=itemid)
+    librml.actions.append(Action(type=ActionType.READ, permission=True, restrictions=[
+        Restriction(res_type=RestrictionType.GROUP, groups=list(groups)),
+        Restriction(res_type=RestrictionType.DATE, fromdate=date(2030, 1, 1))]))
+    librml.actions.append(Action(type=ActionType.INDEX, permission=True))
+    return librml
+
+
+def test_identical_bodies_are_shared():
+    pool = InternPool()
+    first = pool.intern(_record('a'))
+    second = pool.intern(_record('b'))
+    assert first.actions.list is second.actions.list
+    assert first.to_dict()['actions'] == _record('x').to_dict()['actions']
+
+
+def test_pool_releases_unused_entries():
+    pool = InternPool()
+    records = [pool.intern(_record(str(i), groups=['group{}'.format(i)])) for i in range(10)]
+    assert len(pool.bodies) == 10
+    del records
+    gc.collect()
+    assert len(pool) == 0
+    assert len(pool.bodies) == 0
+
+
+def test_default_pool_does_not_grow_without_records():
+    before = len(default_pool)
+    records = [intern(_record(str(i), groups=['leak{}'.format(i)])) for i in range(100)]
+    assert len(default_pool) > before
+    del records
+    gc.collect()
+    assert len(default_pool) == before
+
+
+def test_shared_list_copy_on_write():
+    pool = InternPool()
+    first = pool.intern(_record('a'))
+    second = pool.intern(_record('b'))
+    first.actions.append(Action(type=ActionType.PRINT, permission=True))
+    assert len(first.actions) == 3
+    assert len(second.actions) == 2
+    assert isinstance(second.actions, SharedList)
@@ -0,0 +1,86 @@
+import datetime
+import random
+
+from model.decision import Context
+from model.invindex import RightsIndex
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+
+GROUPS = ['staff', 'students', 'campus', 'guests']
+
+
+def _restriction(rtype, **values):
+    restriction = Restriction(rtype)
+    for name, value in values.items():
+        setattr(restriction, name, value)
+    return restriction
+
+
+def _record(itemid, *alternatives, action=ActionType.READ):
+    actions = []
+    for restrictions in alternatives:
+        a = Action(action, permission=True)
+        for restriction in restrictions:
+            a.restrictions.append(restriction)
+        actions.append(a)
+    return LibRML(itemid=itemid, tenant='t', actions=actions)
+
+
+def test_every_group_is_posted():
+    record = _record('a', [_restriction(RestrictionType.GROUP, groups=['staff', 'students']),
+                           _restriction(RestrictionType.GROUP, groups=['campus'])])
+    index = RightsIndex([record])
+    for group in ('staff', 'students', 'campus'):
+        assert index.with_group(group, ActionType.READ) == {'a'}
+    assert index.with_group('guests', ActionType.READ) == set()
+    assert index.allowed(ActionType.READ, Context(groups=['staff', 'campus'])) == {'a'}
+    assert index.allowed(ActionType.READ, Context(groups=['staff'])) == set()
+
+
+def test_postings_and_remove():
+    index = RightsIndex([
+        _record('a', []),
+        _record('b', [_restriction(RestrictionType.COMMERCIALUSE, noncommercialuse=True)]),
+        _record('c', [_restriction(RestrictionType.PARTS, parts='1')]),
+    ])
+    assert index.items(ActionType.READ) == {'a', 'b', 'c'}
+    assert index.unrestricted_items(ActionType.READ) == {'a', 'c'}
+    assert index.with_restriction('commercialuse', ActionType.READ) == {'b'}
+    assert index.allowed(ActionType.READ, Context(commercial=True)) == {'a', 'c'}
+    assert index.allowed(ActionType.READ, Context()) == {'a', 'b', 'c'}
+    assert index.remove('b')
+    assert not index.remove('b')
+    assert index.allowed(ActionType.READ, Context()) == {'a', 'c'}
+    assert index.clauses[ActionType.READ] == {}
+    index.add(_record('a', [_restriction(RestrictionType.AGE, minage='18')]))
+    assert index.allowed(ActionType.READ, Context(age=12)) == {'c'}
+    assert index.allowed(ActionType.READ, Context(age=30)) == {'a', 'c'}
+
+
+def _random_restriction(rng):
+    rtype = rng.choice([RestrictionType.GROUP, RestrictionType.AGE, RestrictionType.DATE,
+                        RestrictionType.COMMERCIALUSE, RestrictionType.LOCATION, RestrictionType.PARTS])
+    if rtype == RestrictionType.GROUP:
+        return _restriction(rtype, groups=rng.sample(GROUPS, rng.randint(1, 2)))
+    if rtype == RestrictionType.AGE:
+        return _restriction(rtype, minage=str(rng.choice([12, 18])))
+    if rtype == RestrictionType.DATE:
+        return _restriction(rtype, fromdate=rng.choice([None, datetime.date(2025, 1, 1)]),
+                            todate=rng.choice([None, datetime.date(2027, 1, 1)]))
+    if rtype == RestrictionType.COMMERCIALUSE:
+        return _restriction(rtype, commercialuse=rng.random() < 0.3, noncommercialuse=True)
+    if rtype == RestrictionType.LOCATION:
+        return _restriction(rtype, subnet=['10.0.0.0/8'])
+    return _restriction(rtype, parts='1')
+
+
+def test_allowed_matches_is_allowed():
+    rng = random.Random(7)
+    records = [_record(str(i), *[[_random_restriction(rng) for _ in range(rng.randint(0, 3))]
+                                 for _ in range(rng.randint(1, 3))]) for i in range(300)]
+    index = RightsIndex(records)
+    for _ in range(100):
+        context = Context(groups=rng.sample(GROUPS, rng.randint(0, 3)), age=rng.choice([None, 15, 30]),
+                          ip=rng.choice([None, '10.1.2.3', '192.168.0.1']), commercial=rng.random() < 0.5,
+                          date=datetime.date(rng.choice([2024, 2026, 2028]), 6, 1))
+        assert index.allowed(ActionType.READ, context) == \
+            {record.id for record in records if record.is_allowed(ActionType.READ, context)}
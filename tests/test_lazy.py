@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+
+from model.librml import LibRML, Action, ActionType, TypedList
+
+RECORD = {
+    'id': 'item',
+    'tenant': 'tenant',
+    'template': 'CCBY',
+    'actions': [
+        {'type': 'read', 'permission': True},
+        {'type': 'print', 'permission': True,
+         'restrictions': [{'type': 'commercialuse', 'noncommercialuse': True}]},
+        {'type': 'read', 'permission': False},
+    ],
+}
+
+
+def test_lazy_json_matches_eager():
+    data = json.dumps(RECORD)
+    lazy = LibRML.from_jsonstr(data, lazy=True)
+    assert not lazy.is_materialized()
+    assert lazy.template == 'CCBY'
+    assert lazy.to_dict() == LibRML.from_jsonstr(data).to_dict()
+    assert lazy.to_xml() == LibRML.from_jsonstr(data).to_xml()
+
+
+def test_actions_of_decodes_one_type():
+    lazy = LibRML.from_jsonstr(json.dumps(RECORD), lazy=True)
+    reads = lazy.actions_of(ActionType.READ)
+    assert [a.permission for a in reads] == [True, False]
+    assert not lazy.is_materialized()
+    assert lazy.actions[0] is reads[0]
+
+
+def test_concurrent_materialization_publishes_once():
+    calls = []
+
+    def loader():
+        calls.append(threading.get_ident())
+        time.sleep(0.01)
+        return TypedList(Action, Action(type=ActionType.READ, permission=True))
+
+    for _ in range(20):
+        librml = LibRML(itemid='item')
+        librml.defer_actions(loader)
+        barrier = threading.Barrier(8)
+        results = []
+        errors = []
+
+        def read():
+            barrier.wait()
+            try:
+                results.append(librml.actions)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert len(results) == 8
+        assert all(actions is results[0] for actions in results)
+        assert librml.actions is results[0]
+    assert len(calls) >= 20
+
+
+def test_records_materialize_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def loader():
+        # both loaders have to run at the same time to get past the barrier
+        barrier.wait()
+        return TypedList(Action, Action(type=ActionType.READ, permission=True))
+
+    records = [LibRML(itemid=str(i)) for i in range(2)]
+    for librml in records:
+        librml.defer_actions(loader)
+    errors = []
+
+    def read(librml):
+        try:
+            librml.actions
+        except threading.BrokenBarrierError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=read, args=(librml,)) for librml in records]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert all(librml.is_materialized() for librml in records)
+
+
+def test_concurrent_lazy_json_readers():
+    for _ in range(50):
+        librml = LibRML.from_jsonstr(json.dumps(RECORD), lazy=True)
+        barrier = threading.Barrier(4)
+        seen = []
+
+        def read():
+            barrier.wait()
+            seen.append([id(a) for a in librml.actions])
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(ids == seen[0] for ids in seen)
+
+
+def test_lazy_ndjson_reports_malformed_actions():
+    import io
+    from model.ndjson import iter_ndjson
+
+    lines = [
+        dict(RECORD, id='good'),
+        dict(RECORD, id='scalar', actions='read'),
+        dict(RECORD, id='strings', actions=['read']),
+        dict(RECORD, id='untyped', actions=[{'permission': True}]),
+        dict(RECORD, id='restriction', actions=[{'type': 'read', 'restrictions': [{'parts': 1}]}]),
+        dict(RECORD, id='bogus', actions=[{'type': 'read', 'restrictions': [{'type': 'bogus'}]}]),
+        dict(RECORD, id='numeric', actions=[{'type': 'read', 'restrictions': [{'type': 3}]}]),
+    ]
+    source = io.StringIO(''.join(json.dumps(line) + '\n' for line in lines))
+    errors = []
+    records = list(iter_ndjson(source, on_error=lambda lineno, line, error: errors.append(lineno), lazy=True))
+    assert [record.id for record in records] == ['good']
+    assert errors == [2, 3, 4, 5, 6, 7]
@@ -0,0 +1,67 @@
+import os
+import shutil
+
+import pytest
+
+import tmpl.TemplateManager
+from conftest import TEMPLATE_PATH
+from tmpl.TemplateManager import TemplateManager
+from tmpl.manifest import write_manifest
+
+USAGEGUIDE = 'https://creativecommons.org/licenses/by/4.0/'
+
+
+@pytest.fixture
+def template_dir(tmp_path, monkeypatch):
+    for name in ('librml-tmpl-CCBY.jinja', 'librml-tmpl-CCBY.meta.json', 'librml-tmpl-CC0.jinja',
+                 'librml-tmpl-CC0.meta.json'):
+        shutil.copy2(str(TEMPLATE_PATH / name), str(tmp_path / name))
+    monkeypatch.setattr(tmpl.TemplateManager.Config, 'TEMPLATE_PATH', tmp_path, raising=False)
+    monkeypatch.setattr(tmpl.TemplateManager.Config, 'TEMPLATE_CHECK_INTERVAL', 0, raising=False)
+    monkeypatch.setattr(tmpl.TemplateManager.Config, 'TEMPLATE_MANIFEST', None, raising=False)
+    monkeypatch.setattr(TemplateManager, '_TemplateManager__instance', None)
+    yield tmp_path
+    monkeypatch.setattr(TemplateManager, '_TemplateManager__instance', None)
+
+
+def _fresh_manager(monkeypatch):
+    monkeypatch.setattr(TemplateManager, '_TemplateManager__instance', None)
+    return TemplateManager()
+
+
+def test_manifest_compiles_templates_lazily(template_dir, monkeypatch):
+    write_manifest()
+    tm = _fresh_manager(monkeypatch)
+    assert sorted(tm.getTemplateList()) == ['CC0', 'CCBY']
+    assert tm.compiled == {}
+    assert tm.render('CCBY')['usageguide'] == USAGEGUIDE
+    assert list(tm.compiled) == ['CCBY']
+
+
+def test_manifest_detects_edit_with_same_mtime_and_size(template_dir, monkeypatch):
+    write_manifest()
+    filename = template_dir / 'librml-tmpl-CCBY.jinja'
+    stat = os.stat(str(filename))
+    source = filename.read_text(encoding='utf-8')
+    edited = source.replace('licenses/by/4.0/', 'licenses/xy/4.0/')
+    assert len(edited) == len(source) and edited != source
+    filename.write_text(edited, encoding='utf-8')
+    os.utime(str(filename), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    tm = _fresh_manager(monkeypatch)
+    tm.getTemplateList()
+    assert sorted(tm.codes) == ['CC0', 'CCBY']
+    assert tm.render('CCBY')['usageguide'] == 'https://creativecommons.org/licenses/xy/4.0/'
+
+
+def test_manifest_ignored_when_size_changes(template_dir, monkeypatch):
+    write_manifest()
+    filename = template_dir / 'librml-tmpl-CCBY.jinja'
+    stat = os.stat(str(filename))
+    filename.write_text(filename.read_text(encoding='utf-8').replace('4.0/', '4.0/legalcode'), encoding='utf-8')
+    os.utime(str(filename), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    tm = _fresh_manager(monkeypatch)
+    tm.getTemplateList()
+    assert tm.codes == {}
+    assert tm.render('CCBY')['usageguide'] == USAGEGUIDE + 'legalcode'
@@ -0,0 +1,49 @@
+import io
+import json
+
+from model.librml import LibRML, Action, ActionType
+from model.ndjson import iter_ndjson, write_ndjson
+
+
+def _records(count):
+    return [LibRML(itemid='item-{}-ü'.format(i), tenant='t', actions=[Action(ActionType.READ, permission=True)])
+            for i in range(count)]
+
+
+def _text(records):
+    fileobj = io.StringIO()
+    assert write_ndjson(records, fileobj) == len(records)
+    return fileobj.getvalue()
+
+
+def _read(fileobj, **kwargs):
+    errors = []
+    records = list(iter_ndjson(fileobj, on_error=lambda lineno, line, error: errors.append(lineno), **kwargs))
+    return [record.id for record in records], errors
+
+
+def test_text_and_binary_round_trip():
+    records = _records(5)
+    expected = [record.id for record in records]
+    data = _text(records)
+    binary = io.BytesIO()
+    write_ndjson(records, binary)
+    assert binary.getvalue() == data.encode('utf-8')
+    for chunk_size in (1, 3, 7, 1 << 16):
+        assert _read(io.StringIO(data), chunk_size=chunk_size) == (expected, [])
+        assert _read(io.BytesIO(data.encode('utf-8')), chunk_size=chunk_size) == (expected, [])
+
+
+def test_last_line_without_newline():
+    data = _text(_records(2)).rstrip('\n')
+    assert _read(io.BytesIO(data.encode('utf-8')), chunk_size=5)[0] == ['item-0-ü', 'item-1-ü']
+
+
+def test_bad_lines_do_not_stop_the_stream():
+    lines = _text(_records(3)).encode('utf-8').split(b'\n')
+    data = b'\n'.join([lines[0], b'{"id": "broken"', b'\xff\xfe not utf-8', b'', b'[1, 2]', lines[1],
+                       json.dumps({'tenant': 't'}).encode('utf-8'), lines[2]])
+    for chunk_size in (2, 1 << 16):
+        ids, errors = _read(io.BytesIO(data), chunk_size=chunk_size)
+        assert ids == ['item-0-ü', 'item-1-ü', 'item-2-ü']
+        assert errors == [2, 3, 5, 7]
@@ -0,0 +1,93 @@
+import datetime
+
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+from model.repository import LibRMLRepository
+
+
+def _record(itemid, groups=None, fromdate=None, todate=None, tenant='t', template='T', commercial=False):
+    action = Action(ActionType.READ, permission=True)
+    if groups is not None:
+        restriction = Restriction(RestrictionType.GROUP)
+        restriction.groups = list(groups)
+        action.restrictions.append(restriction)
+    if fromdate is not None or todate is not None:
+        restriction = Restriction(RestrictionType.DATE)
+        restriction.fromdate = fromdate
+        restriction.todate = todate
+        action.restrictions.append(restriction)
+    actions = [action, Action(ActionType.PRINT, permission=False)]
+    if commercial:
+        restriction = Restriction(RestrictionType.COMMERCIALUSE)
+        restriction.commercialuse = True
+        reuse = Action(ActionType.REUSE, permission=True)
+        reuse.restrictions.append(restriction)
+        actions.append(reuse)
+    return LibRML(itemid=itemid, tenant=tenant, template=template, actions=actions)
+
+
+def _ids(records):
+    return [record.id for record in records]
+
+
+def test_upsert_get_delete():
+    repository = LibRMLRepository()
+    record = _record('a', groups=['staff'])
+    assert repository.upsert(record) == 1
+    assert 'a' in repository and len(repository) == 1
+    assert repository.get('a').to_dict() == record.to_dict()
+    assert repository.get('missing') is None
+    assert repository.delete('a')
+    assert not repository.delete('a')
+    assert len(repository) == 0
+    assert _ids(repository.with_group('staff')) == []
+
+
+def test_replace_updates_side_tables():
+    repository = LibRMLRepository()
+    repository.upsert(_record('a', groups=['old']))
+    repository.upsert(_record('a', groups=['new']))
+    assert _ids(repository.with_group('old')) == []
+    assert _ids(repository.with_group('new')) == ['a']
+
+
+def test_same_id_twice_in_one_batch_keeps_last():
+    repository = LibRMLRepository()
+    assert repository.upsert_many([_record('a', groups=['old']), _record('b'), _record('a', groups=['new'])]) == 3
+    assert repository.ids() == ['a', 'b']
+    assert _ids(repository.with_group('old')) == []
+    assert _ids(repository.with_group('new')) == ['a']
+    assert repository.get('a').actions[0].restrictions[0].groups == ['new']
+
+
+def test_queries():
+    repository = LibRMLRepository()
+    repository.upsert_many([
+        _record('a', groups=['staff'], tenant='x', template='CCBY'),
+        _record('b', fromdate=datetime.date(2025, 1, 1), tenant='x'),
+        _record('c', todate=datetime.date(2024, 6, 30), commercial=True),
+        _record('d', groups=['students'], fromdate=datetime.date(2030, 1, 1)),
+    ], batch_size=2)
+    assert _ids(repository.all()) == ['a', 'b', 'c', 'd']
+    assert _ids(repository.by_template('CCBY')) == ['a']
+    assert _ids(repository.by_tenant('x')) == ['a', 'b']
+    assert _ids(repository.with_action(ActionType.READ)) == ['a', 'b', 'c', 'd']
+    assert _ids(repository.with_action('print', permission=False)) == ['a', 'b', 'c', 'd']
+    assert _ids(repository.with_action(ActionType.REUSE)) == ['c']
+    assert _ids(repository.with_group('staff')) == ['a']
+    assert _ids(repository.with_group('students', ActionType.READ)) == ['d']
+    assert _ids(repository.with_group('students', ActionType.PRINT)) == []
+    assert _ids(repository.with_restriction(RestrictionType.DATE)) == ['b', 'c', 'd']
+    assert _ids(repository.with_restriction('commercialuse', ActionType.REUSE)) == ['c']
+    assert _ids(repository.embargo_ends_before(datetime.date(2026, 1, 1))) == ['b']
+    assert _ids(repository.access_ends_before(datetime.date(2026, 1, 1))) == ['c']
+
+
+def test_records_materialize_lazily():
+    repository = LibRMLRepository()
+    record = _record('a', groups=['staff'], fromdate=datetime.date(2025, 1, 1))
+    repository.upsert(record)
+    loaded = repository.get('a')
+    assert not loaded.is_materialized()
+    assert loaded.template == 'T'
+    assert loaded.to_dict() == record.to_dict()
+    assert loaded.is_materialized()
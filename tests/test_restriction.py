@@ -0,0 +1,32 @@
+from datetime import date
+
+import pytest
+
+from model.librml import Restriction, RestrictionType, GroupRestriction, DateRestriction
+
+
+def test_positional_arguments_follow_the_old_signature():
+    group = Restriction(RestrictionType.GROUP, None, ['staff'])
+    assert isinstance(group, GroupRestriction)
+    assert group.groups == ['staff']
+
+    embargo = Restriction(RestrictionType.DATE, None, None, None, None, None, None, None, date(2030, 1, 1))
+    assert isinstance(embargo, DateRestriction)
+    assert embargo.fromdate == date(2030, 1, 1)
+
+
+def test_positional_and_keyword_argument_clash():
+    with pytest.raises(TypeError):
+        Restriction(RestrictionType.GROUP, None, ['staff'], groups=['guests'])
+
+
+def test_unknown_keyword_is_rejected():
+    with pytest.raises(TypeError):
+        Restriction(res_type=RestrictionType.GROUP, group=['staff'])
+
+
+def test_list_fields_are_not_shared():
+    first = Restriction(res_type=RestrictionType.GROUP)
+    second = Restriction(res_type=RestrictionType.GROUP)
+    first.groups.append('staff')
+    assert second.groups == []
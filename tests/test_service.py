@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from model.librml import LibRML, Action, ActionType
+from service.server import DecisionService, DecisionServer, RequestError
+
+
+class Broken(object):
+    id = 'broken'
+
+    def is_allowed(self, action, context):
+        raise RuntimeError('broken record')
+
+
+KEY = (frozenset(), None, None, None, False, None)
+
+
+def _service(**kwargs):
+    record = LibRML(itemid='item', tenant='t', actions=[Action(ActionType.READ, permission=True)])
+    return DecisionService([record, Broken()], **kwargs)
+
+
+def test_failing_query_fails_alone():
+    async def run():
+        service = _service()
+        return await asyncio.gather(service.allowed('item', ActionType.READ, KEY),
+                                    service.allowed('broken', ActionType.READ, KEY), return_exceptions=True)
+
+    allowed, error = asyncio.run(run())
+    assert allowed is True
+    assert isinstance(error, RuntimeError)
+
+
+def test_lone_request_does_not_wait_for_batch():
+    async def run():
+        service = _service(max_delay=5.0)
+        started = time.perf_counter()
+        await service.allowed('item', ActionType.READ, KEY)
+        return time.perf_counter() - started
+
+    assert asyncio.run(run()) < 1.0
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/allowed', {'id': 1, 'action': 'read'}),
+    ('/allowed', {'id': ['item'], 'action': 'read'}),
+    ('/allowed', {'action': 'read'}),
+    ('/allowed/bulk', {'ids': ['item', 2], 'action': 'read'}),
+    ('/allowed/bulk', {'ids': 'item', 'action': 'read'}),
+])
+def test_ids_must_be_strings(path, body):
+    server = DecisionServer(_service())
+    with pytest.raises(RequestError) as error:
+        asyncio.run(server.dispatch('POST', path, json.dumps(body).encode('utf-8')))
+    assert error.value.status == 400
+
+
+def test_dispatch_answers():
+    server = DecisionServer(_service())
+    status, payload = asyncio.run(server.dispatch('POST', '/allowed/bulk',
+                                                  json.dumps({'ids': ['item'], 'action': 'read'}).encode('utf-8')))
+    assert status == 200
+    assert payload['results'] == {'item': True}
+
+
+async def _request(port, data):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def test_unknown_paths_share_one_counter_and_long_lines_get_400():
+    async def run():
+        server = DecisionServer(_service(), port=0)
+        await server.start()
+        try:
+            for i in range(5):
+                response = await _request(server.port, 'GET /random-{} HTTP/1.1\r\nConnection: close\r\n\r\n'
+                                          .format(i).encode('latin-1'))
+                assert response.startswith(b'HTTP/1.1 404')
+            try:
+                response = await _request(server.port, b'GET /' + b'x' * (1 << 17) + b' HTTP/1.1\r\n\r\n')
+            except ConnectionResetError:
+                # the server closes with the rest of the line unread, the reset can beat the answer
+                response = None
+            assert response is None or response.startswith(b'HTTP/1.1 400')
+            response = await _request(server.port, b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n')
+            assert response.startswith(b'HTTP/1.1 200')
+            return server.service.metrics.snapshot()
+        finally:
+            await server.close()
+
+    metrics = asyncio.run(run())
+    assert metrics['requests'] == {'other': 6, '/health': 1}
+    assert metrics['errors'] == 6
@@ -0,0 +1,61 @@
+import datetime
+import json
+
+import pytest
+
+from model.librml import LibRML
+from tmpl.TemplateManager import TemplateManager
+
+VALUES = {
+    'date': datetime.date(2030, 1, 1),
+    'list': ['staff', 'students'],
+}
+
+
+def _variables(template):
+    return {pftid: VALUES.get(pfttype, 'value') for pftid, pfttype, pftdesc in
+            TemplateManager().getFillableRestriction(template)}
+
+
+def _templates():
+    return TemplateManager().getTemplateList()
+
+
+def test_templates_are_found():
+    assert 'CCBY' in _templates()
+    assert 'Group-Embargo' in _templates()
+
+
+@pytest.mark.parametrize('template', _templates())
+def test_template_renders_valid_json(template):
+    variables = _variables(template)
+    source = TemplateManager().getTemplate(template).render(variables)
+    data = json.loads(source)
+    assert data['template']
+    assert isinstance(data['actions'], list)
+
+
+@pytest.mark.parametrize('template', _templates())
+def test_template_renders_valid_librml(template):
+    data = TemplateManager().render(template, _variables(template))
+    data['id'] = 'item'
+    librml = LibRML(itemid=None)
+    librml.from_dict(data)
+    assert librml.template
+    assert len(librml.actions) > 0
+
+
+@pytest.mark.parametrize('groups', [[], ['staff'], ['staff', 'students "guests"']])
+def test_group_embargo_groups(groups):
+    data = TemplateManager().render('Group-Embargo', dict(embargodate=datetime.date(2030, 1, 1), groups=groups))
+    data['id'] = 'item'
+    librml = LibRML(itemid=None)
+    librml.from_dict(data)
+    read = librml.actions_of('read')[0]
+    assert [r.groups for r in read.restrictions if r.type.name == 'GROUP'] == [groups]
+
+
+def test_render_returns_a_copy():
+    first = TemplateManager().render('CCBY')
+    first['actions'].clear()
+    assert TemplateManager().render('CCBY')['actions']
@@ -0,0 +1,65 @@
+import datetime
+
+from model.librml import Action, ActionType
+from model.names import ACTIONS, TEMPLATEVARS
+from tmpl.templateutils import from_template, from_template_many, from_reference, to_reference
+
+ROWS = [
+    ('a', 't', {'groups': ['staff'], 'embargodate': datetime.date(2030, 1, 1)}),
+    ('b', 't', {'groups': ['students'], 'embargodate': datetime.date(2031, 1, 1)}),
+    ('c', 't', {'groups': ['staff'], 'embargodate': datetime.date(2030, 1, 1)}),
+]
+
+
+def test_many_matches_single_records():
+    for interned in (True, False):
+        records = list(from_template_many('Group-Embargo', ROWS, interned=interned, cache_size=1))
+        assert [record.id for record in records] == ['a', 'b', 'c']
+        for record, (itemid, tenant, variables) in zip(records, ROWS):
+            expected = from_template('Group-Embargo', itemid, tenant, **variables)
+            assert record.to_dict() == expected.to_dict()
+
+
+def test_many_records_do_not_share_mutations():
+    first, second, third = from_template_many('Group-Embargo', ROWS)
+    first.actions.thaw(0).permission = False
+    assert third.actions[0].permission
+    assert first.actions[0].permission is False
+
+
+def _embargo(**kwargs):
+    return from_template('Group-Embargo', 'item', 't', groups=['staff'], embargodate=datetime.date(2030, 1, 1),
+                         **kwargs)
+
+
+def test_reference_round_trip():
+    for interned in (False, True):
+        record = _embargo(interned=interned)
+        data = to_reference(record)
+        assert TEMPLATEVARS in data and ACTIONS not in data
+        assert from_reference(data).to_dict() == record.to_dict()
+
+
+def test_replaced_actions_leave_reference_mode():
+    record = _embargo()
+    record.actions = [action for action in record.actions if action.type != ActionType.READ] + \
+        [Action(ActionType.MOVE, permission=True)]
+    assert record.templatevars is None
+    restored = from_reference(to_reference(record))
+    assert restored.to_dict() == record.to_dict()
+    assert not restored.actions_of(ActionType.READ)
+    assert restored.actions_of(ActionType.MOVE)
+
+
+def test_changed_in_place_leave_reference_mode():
+    record = _embargo()
+    record.actions.append(Action(ActionType.MOVE, permission=True))
+    data = to_reference(record)
+    assert TEMPLATEVARS not in data
+    assert from_reference(data).to_dict() == record.to_dict()
+
+
+def test_from_dict_clears_templatevars():
+    record = _embargo()
+    record.from_dict(dict(record.to_dict(), actions=[]))
+    assert record.templatevars is None
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import pytest
+
+from model.decision import Context
+from model.librml import LibRML, Action, ActionType, Restriction, RestrictionType
+from model.usage import UsageStore, MemoryUsageStore, AsyncUsageStore, consume, usage_limits
+
+
+def _restriction(rtype, **values):
+    restriction = Restriction(rtype)
+    for name, value in values.items():
+        setattr(restriction, name, value)
+    return restriction
+
+
+def _record(*alternatives):
+    actions = []
+    for restrictions in alternatives:
+        action = Action(ActionType.READ, permission=True)
+        for restriction in restrictions:
+            action.restrictions.append(restriction)
+        actions.append(action)
+    return LibRML(itemid='item', tenant='t', actions=actions)
+
+
+STAFF_OR_ONE_SESSION = _record(
+    [_restriction(RestrictionType.GROUP, groups=['staff'])],
+    [_restriction(RestrictionType.CONCURRENT, sessions=1)],
+)
+
+
+def test_limits_of_matching_alternatives_only():
+    assert usage_limits(STAFF_OR_ONE_SESSION, ActionType.READ, Context(groups=['staff'])) == [(None, None), (None, 1)]
+    assert usage_limits(STAFF_OR_ONE_SESSION, ActionType.READ, Context()) == [(None, 1)]
+
+
+def test_unlimited_alternative_is_not_capped():
+    store = MemoryUsageStore()
+    staff = Context(groups=['staff'])
+    assert [consume(STAFF_OR_ONE_SESSION, ActionType.READ, staff, store, session=str(i)) for i in range(3)] == \
+        [True, True, True]
+    assert [consume(STAFF_OR_ONE_SESSION, ActionType.READ, Context(), store, session=str(i)) for i in range(3)] == \
+        [True, False, False]
+
+
+def test_denied_only_when_no_alternative_has_capacity():
+    record = _record(
+        [_restriction(RestrictionType.COUNT, count=1)],
+        [_restriction(RestrictionType.GROUP, groups=['staff']), _restriction(RestrictionType.COUNT, count=3)],
+    )
+    store = MemoryUsageStore()
+    assert [consume(record, ActionType.READ, Context(), store) for _ in range(2)] == [True, False]
+    assert [consume(record, ActionType.READ, Context(groups=['staff']), store) for _ in range(3)] == \
+        [True, True, False]
+
+
+def test_session_required():
+    with pytest.raises(ValueError):
+        consume(STAFF_OR_ONE_SESSION, ActionType.READ, Context(), MemoryUsageStore())
+
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        UsageStore()
+
+
+def test_async_close_runs_in_executor():
+    threads = []
+
+    class Store(MemoryUsageStore):
+        def close(self):
+            threads.append(threading.current_thread())
+
+    asyncio.run(AsyncUsageStore(Store()).close())
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_limits_come_from_the_compiled_plan(monkeypatch):
+    from model.groups import GroupDictionary
+
+    STAFF_OR_ONE_SESSION.compile()
+
+    def fail(self, groups):
+        raise AssertionError('restrictions compiled again')
+
+    monkeypatch.setattr(GroupDictionary, 'mask', fail)
+    for _ in range(2):
+        assert usage_limits(STAFF_OR_ONE_SESSION, ActionType.READ, Context()) == [(None, 1)]
+        assert consume(STAFF_OR_ONE_SESSION, ActionType.READ, Context(groups=['staff']), MemoryUsageStore())
+
+
+def test_zero_limit_denies():
+    store = MemoryUsageStore()
+    assert not store.check_and_increment('key', 0)
+    assert not store.acquire('key', 'session', 0)
+    assert store.sessions('key') == 0
+    record = _record([_restriction(RestrictionType.CONCURRENT, sessions=0)])
+    assert not consume(record, ActionType.READ, Context(), store, session='session')
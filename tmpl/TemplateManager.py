@@ -1,12 +1,18 @@
+import collections
+import hashlib
 import json
 import logging
+import os
 import pathlib
+import threading
+import time
 
 from config import Config
-from jinja2 import FileSystemLoader, meta
+from jinja2 import Environment, FileSystemLoader, meta
 from jinja2.nativetypes import NativeEnvironment
 
 from common.errors import TemplateNotValidError
+from tmpl.manifest import MANIFEST_NAME, read_manifest
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
@@ -60,58 +66,281 @@ class MetaInformation():
         return self.templateid
 
 
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    hash(value)
+    return value
+
+
+def _copy(data):
+    if isinstance(data, dict):
+        return {k: _copy(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_copy(v) for v in data]
+    return data
+
+
 class TemplateManager(object):
     __instance = None
+    __initialized = False
 
     def __init__(self):
+        if self.__initialized:
+            return
+        self.__initialized = True
+        self.path = pathlib.Path(Config.TEMPLATE_PATH)
+        self.interval = getattr(Config, 'TEMPLATE_CHECK_INTERVAL', 2.0)
+        self.cachesize = getattr(Config, 'TEMPLATE_CACHE_SIZE', 1024)
+        self.env = NativeEnvironment(loader=FileSystemLoader(self.path))
+        self.render_env = Environment(loader=FileSystemLoader(self.path))
+        self.files = {}
+        self.names = {}
+        self.pending = set()
+        self.sources = {}
         self.templates = {}
-        T_PATH = Config.TEMPLATE_PATH
-        env = NativeEnvironment(loader=FileSystemLoader(T_PATH))
-        templates = env.list_templates('.jinja')
-        for template_name in templates:
-            try:
-                template_source = env.loader.get_source(env, template_name)[0]
-                parsed_content = env.parse(template_source)
-                vars = meta.find_undeclared_variables(parsed_content)
-                logger.info('Template: {}'.format(template_name))
-                metainfo = MetaInformation(pathlib.Path(T_PATH / template_name))
-                variables = []
-                for var in vars:
-                    logger.info('.. Variable: {}'.format(var))
-                    if metainfo:
-                        readablename, datatype, description, source = metainfo.getVarInfo(var)
-                        variables.append(
-                            dict(variable=var,
-                                 readablename=readablename,
-                                 datatype=datatype,
-                                 description=description,
-                                 source=source))
-                tid, tname, description = metainfo.getInfo()
-                if tname is None:
-                    tname = template_name
-                if description is None:
-                    description = 'No metainfo-file for this template, create one!'
-                self.templates[tid] = dict(id=tid,
-                                           templatename=tname,
-                                           description=description,
-                                           vars=variables)
-            except TemplateNotValidError as error:
-                logger.error('Can not load template from filesystem: {}'.format(template_name))
+        self.compiled = {}
+        self.codes = {}
+        self.hashes = {}
+        self.rendered = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lastscan = None
+        self.lock = threading.RLock()
 
     def __new__(cls, *args, **kwargs):
         if TemplateManager.__instance == None:
             logger.debug("TemplateManager init.")
             TemplateManager.__instance = object.__new__(cls)
-            TemplateManager.__instance.__init__()
         else:
             logger.debug("TemplateManager reuse.")
         return TemplateManager.__instance
 
+    def _stat(self, filename):
+        try:
+            stat = os.stat(self.path / filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _signatures(self):
+        current = {}
+        for template_name in self.env.list_templates('.jinja'):
+            metafilename = pathlib.PurePath(template_name).with_suffix('.meta.json')
+            current[template_name] = (self._stat(template_name), self._stat(metafilename))
+        return current
+
+    def manifestPath(self):
+        return pathlib.Path(getattr(Config, 'TEMPLATE_MANIFEST', None) or self.path / MANIFEST_NAME)
+
+    def _adopt_manifest(self, current):
+        manifest = read_manifest(self.manifestPath(), current)
+        if manifest is None:
+            return
+        for entry in manifest['templates']:
+            template_name = entry['name']
+            tid = entry['id']
+            self.files[template_name] = current[template_name]
+            self.names[template_name] = tid
+            if tid is None:
+                continue
+            self.sources[tid] = template_name
+            self.templates[tid] = entry['meta']
+            self.hashes[tid] = entry['hash']
+            self.codes[tid] = entry['code']
+        logger.info('Loaded {} templates from manifest.'.format(len(self.sources)))
+
+    def rescan(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self.lastscan is not None and now - self.lastscan < self.interval:
+            return
+        with self.lock:
+            current = self._signatures()
+            if self.lastscan is None:
+                self._adopt_manifest(current)
+            self.lastscan = now
+            for template_name in list(self.files):
+                if template_name not in current:
+                    logger.info('Template removed: {}'.format(template_name))
+                    self._forget(template_name)
+            for template_name, signature in current.items():
+                if self.files.get(template_name) != signature:
+                    if template_name in self.files:
+                        logger.info('Template changed: {}'.format(template_name))
+                    self._forget(template_name)
+                    self.files[template_name] = signature
+                    self.pending.add(template_name)
+
+    def _forget(self, template_name):
+        self.files.pop(template_name, None)
+        self.pending.discard(template_name)
+        tid = self.names.pop(template_name, None)
+        if tid is not None:
+            self.sources.pop(tid, None)
+            self.templates.pop(tid, None)
+            self.compiled.pop(tid, None)
+            self.codes.pop(tid, None)
+            self.hashes.pop(tid, None)
+            for key in [key for key in self.rendered if key[0] == tid]:
+                del self.rendered[key]
+
+    def _register(self, template_name):
+        self.pending.discard(template_name)
+        try:
+            metainfo = MetaInformation(pathlib.Path(self.path / template_name))
+        except TemplateNotValidError:
+            logger.error('Can not load template from filesystem: {}'.format(template_name))
+            self.names[template_name] = None
+            return None
+        tid = metainfo.getID()
+        self.names[template_name] = tid
+        self.sources[tid] = template_name
+        return tid
+
+    def _resolve(self, template):
+        self.rescan()
+        with self.lock:
+            if template in self.sources:
+                return self.sources[template]
+            for template_name in sorted(self.pending):
+                if self._register(template_name) == template:
+                    return template_name
+        return None
+
+    def _load(self, template, template_name):
+        template_source = self.env.loader.get_source(self.env, template_name)[0]
+        parsed_content = self.env.parse(template_source)
+        vars = meta.find_undeclared_variables(parsed_content)
+        logger.info('Template: {}'.format(template_name))
+        metainfo = MetaInformation(pathlib.Path(self.path / template_name))
+        variables = []
+        for var in vars:
+            logger.info('.. Variable: {}'.format(var))
+            if metainfo:
+                readablename, datatype, description, source = metainfo.getVarInfo(var)
+                variables.append(
+                    dict(variable=var,
+                         readablename=readablename,
+                         datatype=datatype,
+                         description=description,
+                         source=source))
+        tid, tname, description = metainfo.getInfo()
+        if tname is None:
+            tname = template_name
+        if description is None:
+            description = 'No metainfo-file for this template, create one!'
+        self.templates[template] = dict(id=tid,
+                                        templatename=tname,
+                                        description=description,
+                                        vars=variables)
+        return self.templates[template]
+
     def getTemplateList(self):
-        return list(self.templates.keys())
+        self.rescan()
+        with self.lock:
+            for template_name in sorted(self.pending):
+                self._register(template_name)
+            return [self.names[name] for name in sorted(self.names) if self.names[name] is not None]
 
     def getTemplateMeta(self, template):
-        return self.templates.get(template)
+        template_name = self._resolve(template)
+        if template_name is None:
+            return None
+        with self.lock:
+            if template in self.templates:
+                return self.templates[template]
+            try:
+                return self._load(template, template_name)
+            except TemplateNotValidError:
+                logger.error('Can not load template from filesystem: {}'.format(template_name))
+                return None
+
+    def getTemplate(self, template):
+        template_name = self._resolve(template)
+        if template_name is None:
+            return None
+        with self.lock:
+            compiled = self.compiled.get(template)
+            if compiled is None:
+                compiled = self._from_manifest(template, template_name)
+            if compiled is None:
+                compiled = self.render_env.get_template(template_name)
+            self.compiled[template] = compiled
+            return compiled
+
+    def _source_hash(self, template_name):
+        source = self.env.loader.get_source(self.env, template_name)[0]
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def _from_manifest(self, template, template_name):
+        code = self.codes.pop(template, None)
+        if code is None:
+            return None
+        # the signature only covers mtime and size, so check the content before trusting the compiled code
+        if self._source_hash(template_name) != self.hashes.get(template):
+            logger.info('Template {} differs from the manifest, compiling it again.'.format(template_name))
+            self.hashes.pop(template, None)
+            self.templates.pop(template, None)
+            return None
+        code = compile(code, str(self.path / template_name), 'exec')
+        return self.render_env.template_class.from_code(self.render_env, code, self.render_env.make_globals(None))
+
+    def getTemplateHash(self, template):
+        template_name = self._resolve(template)
+        if template_name is None:
+            return None
+        if template in self.codes:
+            self.getTemplate(template)
+        with self.lock:
+            if template not in self.hashes:
+                self.hashes[template] = self._source_hash(template_name)
+            return self.hashes[template]
+
+    def getFillableRestriction(self, template):
+        meta = self.getTemplateMeta(template)
+        if meta is None:
+            return []
+        return [(var['variable'], var['datatype'], var['description']) for var in meta['vars']]
+
+    def render(self, template, variables: dict = None):
+        variables = variables if variables is not None else {}
+        try:
+            key = (template, _freeze(variables))
+        except TypeError:
+            key = None
+        self.rescan()
+        if key is not None:
+            with self.lock:
+                data = self.rendered.get(key)
+                if data is not None:
+                    self.rendered.move_to_end(key)
+                    self.hits += 1
+                    return _copy(data)
+                self.misses += 1
+        compiled = self.getTemplate(template)
+        if compiled is None:
+            raise TemplateNotValidError('No template "{}" found.'.format(template))
+        data = json.loads(compiled.render(variables))
+        if key is not None:
+            with self.lock:
+                self.rendered[key] = data
+                if len(self.rendered) > self.cachesize:
+                    self.rendered.popitem(last=False)
+        return _copy(data)
+
+    def cacheInfo(self):
+        return dict(hits=self.hits, misses=self.misses, maxsize=self.cachesize, currsize=len(self.rendered))
+
+    def clearCache(self):
+        with self.lock:
+            self.compiled.clear()
+            self.rendered.clear()
+            self.hits = 0
+            self.misses = 0
 
 
 if __name__ == '__main__':
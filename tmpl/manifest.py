@@ -0,0 +1,77 @@
+import argparse
+import hashlib
+import json
+import logging
+import pathlib
+
+import jinja2
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'templates.manifest.json'
+MANIFEST_VERSION = 3
+
+
+def signature_hash(signatures: dict):
+    data = json.dumps(sorted(signatures.items()), separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def read_manifest(filename, signatures: dict):
+    filename = pathlib.Path(filename)
+    if not filename.is_file():
+        return None
+    try:
+        with filename.open(encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as error:
+        logger.warning('Can not read template manifest {}: {}'.format(filename, error))
+        return None
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('jinja') != jinja2.__version__:
+        logger.info('Template manifest {} was written by another version, ignored.'.format(filename))
+        return None
+    if manifest.get('hash') != signature_hash(signatures):
+        logger.info('Template manifest {} is outdated, ignored.'.format(filename))
+        return None
+    return manifest
+
+
+def write_manifest(filename=None):
+    from tmpl.TemplateManager import TemplateManager
+
+    tm = TemplateManager()
+    tm.rescan(force=True)
+    tm.getTemplateList()
+    templates = []
+    with tm.lock:
+        signatures = dict(tm.files)
+        names = dict(tm.names)
+    for template_name in sorted(names):
+        tid = names[template_name]
+        entry = dict(name=template_name, id=tid)
+        if tid is not None:
+            source = tm.env.loader.get_source(tm.env, template_name)[0]
+            entry['meta'] = tm.getTemplateMeta(tid)
+            entry['hash'] = tm.getTemplateHash(tid)
+            entry['code'] = tm.render_env.compile(source, template_name, str(tm.path / template_name), raw=True)
+        templates.append(entry)
+
+    manifest = dict(version=MANIFEST_VERSION,
+                    jinja=jinja2.__version__,
+                    hash=signature_hash(signatures),
+                    templates=templates)
+    filename = pathlib.Path(filename) if filename is not None else tm.manifestPath()
+    tmpfile = filename.with_name(filename.name + '.tmp')
+    with tmpfile.open('w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False)
+    tmpfile.replace(filename)
+    logger.info('Wrote manifest for {} templates to {}'.format(len(templates), filename))
+    return filename
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a precompiled manifest of the LibRML templates.')
+    parser.add_argument('output', nargs='?', help='manifest file, defaults to Config.TEMPLATE_MANIFEST or '
+                                                  'the template directory')
+    args = parser.parse_args()
+    print(write_manifest(args.output))
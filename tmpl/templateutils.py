@@ -1,47 +1,160 @@
-import json
+import collections
+import functools
 import logging
+from datetime import date, datetime
 
 from common.errors import TemplateNotValidError
-from model.librml import LibRML
+from model.fingerprint import actions_fingerprint
+from model.librml import LibRML, Action
+from model.names import ID, ACTIONS, TEMPLATEVARS, TEMPLATEHASH
 
 logger = logging.getLogger(__name__)
 
 
-@staticmethod
-def from_template(templateid: str, itemid: str, tenant: str = None, **kwargs):
+def from_template(templateid: str, itemid: str, tenant: str = None, interned: bool = False, **kwargs):
     from tmpl.TemplateManager import TemplateManager
-    from jinja2 import Template
 
     tm = TemplateManager()
-    if template := tm.getTemplate(templateid):
+    if tm.getTemplate(templateid) is not None:
         args = {}
-        if tr := tm.getFillableRestriction(templateid):
-            for pftid, pfttype, pftdesc in tr:
-                logger.debug('Found {} as restriction, type is {}'.format(pftid, pfttype))
-                if pftid in kwargs:
-                    value = kwargs.get(pftid)
-                    logger.debug('Found value in args for {}: {}'.format(pftid, value))
-                    args[pftid] = value
-                else:
-                    logger.error('Can''t find a value for {}'.format(pftid))
-            tmpl_json = json.dumps(template)
-            tmpl = Template(tmpl_json)
-            filled = tmpl.render(args)
-            template = json.loads(filled)
+        for pftid, pfttype, pftdesc in tm.getFillableRestriction(templateid):
+            logger.debug('Found {} as restriction, type is {}'.format(pftid, pfttype))
+            if pftid in kwargs:
+                value = kwargs.get(pftid)
+                logger.debug('Found value in args for {}: {}'.format(pftid, value))
+                args[pftid] = value
+            else:
+                logger.error('Can''t find a value for {}'.format(pftid))
+        template = tm.render(templateid, args)
+
+        ret = LibRML(itemid)
+        template.update(id=itemid)
+        template.update(tenant=tenant)
+
+        ret.from_dict(template)
+        ret.templatevars = args
+        if interned:
+            from model.intern import intern
+            intern(ret)
+        return ret
+
+    else:
+        raise TemplateNotValidError('No template "{}" found.'.format(templateid))
 
-            ret = LibRML(itemid)
-            template.update(id=itemid)
-            template.update(tenant=tenant)
 
-            ret.from_dict(template)
+# Unlike from_template, rows share interned, copy-on-write actions by default: a bulk ingest creates
+# many records per rendered body and sharing is what keeps it cheap. interned=False parses every row.
+def from_template_many(templateid: str, rows, interned: bool = True, pool=None, cache_size: int = 1024):
+    from tmpl.TemplateManager import TemplateManager, _freeze, _copy
+    from model.intern import SharedList, default_pool
+
+    tm = TemplateManager()
+    if tm.getTemplate(templateid) is None:
+        raise TemplateNotValidError('No template "{}" found.'.format(templateid))
+    fillable = [pftid for pftid, pfttype, pftdesc in tm.getFillableRestriction(templateid)]
+    pool = pool if pool is not None else default_pool
+    prototypes = collections.OrderedDict()
+
+    for itemid, tenant, variables in rows:
+        args = {}
+        for pftid in fillable:
+            if pftid in variables:
+                args[pftid] = variables[pftid]
+            else:
+                logger.error('Can''t find a value for {} in row {}'.format(pftid, itemid))
+        try:
+            key = _freeze(args)
+        except TypeError:
+            key = None
+        entry = prototypes.get(key) if key is not None else None
+        if entry is None:
+            data = tm.render(templateid, args)
+            data[ID] = None
+            prototype = LibRML(itemid=None)
+            prototype.from_dict(data)
+            if interned:
+                pool.intern(prototype)
+            entry = (prototype, data)
+            if key is not None:
+                prototypes[key] = entry
+                if len(prototypes) > cache_size:
+                    prototypes.popitem(last=False)
+        elif key is not None:
+            prototypes.move_to_end(key)
+
+        prototype, data = entry
+        if interned:
+            ret = LibRML(itemid=itemid, tenant=tenant, mention=prototype.mention, sharealike=prototype.sharealike,
+                         usageguide=prototype.usageguide, template=prototype.template,
+                         actions=SharedList(Action, prototype.actions.list))
         else:
             ret = LibRML(itemid)
-            template.update(id=itemid)
-            template.update(tenant=tenant)
+            ret.from_dict(dict(_copy(data), id=itemid, tenant=tenant))
+        ret.templatevars = dict(args)
+        yield ret
 
-            ret.from_dict(template)
 
-        return ret
+def _jsonable(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
 
-    else:
+
+def to_reference(librml: LibRML, expanded: bool = False):
+    from tmpl.TemplateManager import TemplateManager
+
+    if librml.template is None or librml.templatevars is None:
+        return librml.to_dict()
+    # actions changed in place since the record was rendered can only be kept in full
+    if librml.is_materialized() and actions_fingerprint(librml.actions) != actions_fingerprint(
+            _render_actions(TemplateManager(), librml.template, librml.templatevars)):
+        logger.debug('Actions of "{}" no longer match template "{}".'.format(librml.id, librml.template))
+        return librml.to_dict()
+    data = librml.to_dict(with_actions=False)
+    data[TEMPLATEVARS] = _jsonable(librml.templatevars)
+    data[TEMPLATEHASH] = TemplateManager().getTemplateHash(librml.template)
+    if expanded:
+        data[ACTIONS] = [action.to_json() for action in librml.actions]
+    return data
+
+
+def _render_actions(tm, templateid, variables, actions=None):
+    if actions is None:
+        actions = tm.render(templateid, variables).get(ACTIONS, [])
+    holder = LibRML(itemid=None)
+    holder.from_dict({ID: None, ACTIONS: actions})
+    return holder.actions
+
+
+def _expand(templateid, variables, templatehash, expanded, fallback):
+    from tmpl.TemplateManager import TemplateManager
+
+    tm = TemplateManager()
+    current = tm.getTemplateHash(templateid)
+    if current is not None and (templatehash is None or current == templatehash):
+        actions = None
+    elif fallback and expanded is not None:
+        logger.info('Template "{}" has changed, using the stored expansion.'.format(templateid))
+        actions = expanded
+    elif current is None:
         raise TemplateNotValidError('No template "{}" found.'.format(templateid))
+    else:
+        logger.warning('Template "{}" has changed, expanding with the current version.'.format(templateid))
+        actions = None
+    return _render_actions(tm, templateid, variables, actions)
+
+
+def from_reference(data: dict, fallback: bool = True):
+    librml = LibRML(itemid=None)
+    if TEMPLATEVARS not in data:
+        librml.from_dict(data)
+        return librml
+    librml.from_dict({k: v for k, v in data.items() if k not in (ACTIONS, TEMPLATEVARS, TEMPLATEHASH)})
+    librml.defer_actions(functools.partial(_expand, librml.template, data[TEMPLATEVARS],
+                                           data.get(TEMPLATEHASH), data.get(ACTIONS), fallback))
+    librml.templatevars = data[TEMPLATEVARS]
+    return librml